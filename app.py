@@ -2,20 +2,50 @@
 Sistema de Controle de Consumo de Insumos - Unidades de Diagnóstico
 Implementação de estruturas de dados e algoritmos clássicos
 """
+import csv
 import os
-os.system("clear")
+import heapq
+import json
+import pickle
 import random
-from datetime import datetime, timedelta
+import sys
+import tempfile
+import threading
+import struct
+import unicodedata
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import date, datetime, timedelta
+from functools import lru_cache, wraps
+from itertools import islice, product
+from time import monotonic, perf_counter
+
+LIMITE_ELEMENTOS_NUMPY = 1 << 22
 
 
 class Insumo:
     """Classe para representar um insumo médico"""
+    __slots__ = ('nome', 'quantidade', 'data', 'validade')
+    
     def __init__(self, nome, quantidade, data, validade_dias=30):
         self.nome = nome
         self.quantidade = quantidade
         self.data = data
         self.validade = data + timedelta(days=validade_dias)
     
+    @classmethod
+    def com_validade(cls, nome, quantidade, data, validade):
+        """Cria um insumo com a data de validade já conhecida"""
+        insumo = cls.__new__(cls)
+        insumo.nome = nome
+        insumo.quantidade = quantidade
+        insumo.data = data
+        insumo.validade = validade
+        return insumo
+    
     def __str__(self):
         return f"{self.data.strftime('%Y-%m-%d')} | {self.nome:20s} | Qtd: {self.quantidade:4d} | Validade: {self.validade.strftime('%Y-%m-%d')}"
     
@@ -23,20 +53,629 @@ class Insumo:
         return self.__str__()
 
 
+class InsumoStore:
+    """
+    Armazenamento colunar de registros de consumo
+    
+    Nomes internados (código inteiro por nome distinto) e arrays NumPy de
+    código, quantidade, data e validade. store[i] monta um Insumo na hora (visão preguiçosa),
+    então busca_sequencial, busca_binaria, merge_sort e quick_sort aceitam o store
+    no lugar de uma lista e trabalham sobre as colunas.
+    """
+    
+    CRITERIOS = ('nome', 'quantidade', 'validade')
+    
+    def __init__(self, registros=()):
+        np = _importar_numpy()
+        self.nomes = []
+        self._codigos = {}
+        self._tamanho = 0
+        self._codigo = np.empty(0, dtype=np.int32)
+        self._quantidade = np.empty(0, dtype=np.int64)
+        self._data = np.empty(0, dtype='datetime64[us]')
+        self._validade = np.empty(0, dtype='datetime64[us]')
+        self._postos_nome = None
+        self.estender(registros)
+    
+    @classmethod
+    def de_colunas(cls, nomes, codigos, quantidades, datas, validades):
+        """Monta um store sobre colunas já prontas, sem copiá-las"""
+        store = cls()
+        store.nomes = list(nomes)
+        store._codigos = {nome: codigo for codigo, nome in enumerate(store.nomes)}
+        store._codigo, store._quantidade = codigos, quantidades
+        store._data, store._validade = datas, validades
+        store._tamanho = len(codigos)
+        store._postos_nome = None
+        return store
+    
+    @property
+    def codigos(self):
+        return self._codigo[:self._tamanho]
+    
+    @property
+    def quantidades(self):
+        return self._quantidade[:self._tamanho]
+    
+    @property
+    def datas(self):
+        return self._data[:self._tamanho]
+    
+    @property
+    def validades(self):
+        return self._validade[:self._tamanho]
+    
+    def codigo(self, nome):
+        """Código interno do nome, criado se ainda não existir"""
+        if nome not in self._codigos:
+            self._codigos[nome] = len(self.nomes)
+            self.nomes.append(nome)
+        return self._codigos[nome]
+    
+    def _reservar(self, extra):
+        np = _importar_numpy()
+        necessario = self._tamanho + extra
+        if necessario <= len(self._codigo):
+            return
+        capacidade = max(necessario, 2 * len(self._codigo), 16)
+        for coluna in ('_codigo', '_quantidade', '_data', '_validade'):
+            antigo = getattr(self, coluna)
+            novo = np.empty(capacidade, dtype=antigo.dtype)
+            novo[:self._tamanho] = antigo[:self._tamanho]
+            setattr(self, coluna, novo)
+    
+    def adicionar(self, insumo):
+        self.estender((insumo,))
+    
+    def estender(self, registros):
+        """Acrescenta vários Insumo de uma vez"""
+        registros = list(registros)
+        if not registros:
+            return
+        self._reservar(len(registros))
+        fim = self._tamanho + len(registros)
+        self._codigo[self._tamanho:fim] = [self.codigo(r.nome) for r in registros]
+        self._quantidade[self._tamanho:fim] = [r.quantidade for r in registros]
+        self._data[self._tamanho:fim] = [r.data for r in registros]
+        self._validade[self._tamanho:fim] = [r.validade for r in registros]
+        self._tamanho = fim
+        self._postos_nome = None
+    
+    def __len__(self):
+        return self._tamanho
+    
+    def __getitem__(self, posicao):
+        if isinstance(posicao, slice):
+            return self.selecionar(range(self._tamanho)[posicao])
+        if posicao < 0:
+            posicao += self._tamanho
+        if not 0 <= posicao < self._tamanho:
+            raise IndexError("posição fora do store")
+        return Insumo.com_validade(
+            self.nomes[self._codigo[posicao]],
+            int(self._quantidade[posicao]),
+            self._data[posicao].item(),
+            self._validade[posicao].item(),
+        )
+    
+    def __iter__(self):
+        for posicao in range(self._tamanho):
+            yield self[posicao]
+    
+    def copy(self):
+        return self.selecionar(range(self._tamanho))
+    
+    def selecionar(self, posicoes):
+        """Novo store com os registros nas posições dadas (na ordem dada)"""
+        np = _importar_numpy()
+        posicoes = np.asarray(posicoes, dtype=np.int64)
+        return InsumoStore.de_colunas(self.nomes, self.codigos[posicoes], self.quantidades[posicoes],
+                                      self.datas[posicoes], self.validades[posicoes])
+    
+    def posicoes_nome(self, nome):
+        """Posições de todos os registros do insumo (sem diferenciar maiúsculas), por varredura vetorizada"""
+        np = _importar_numpy()
+        alvo = nome.lower()
+        codigos = [codigo for codigo, existente in enumerate(self.nomes) if existente.lower() == alvo]
+        return np.flatnonzero(np.isin(self.codigos, codigos))
+    
+    def postos_nome(self):
+        """
+        ({nome em minúsculas: posto}, coluna de postos por registro), que ordena como comparar(..., 'nome')
+        Calculados uma vez e reaproveitados até o store crescer (a coluna é somente leitura)
+        """
+        if self._postos_nome is None:
+            np = _importar_numpy()
+            minusculos = [nome.lower() for nome in self.nomes]
+            posto = {nome: i for i, nome in enumerate(sorted(set(minusculos)))}
+            coluna = np.array([posto[nome] for nome in minusculos], dtype=np.int64)[self.codigos]
+            coluna.flags.writeable = False
+            self._postos_nome = posto, coluna
+        return self._postos_nome
+    
+    def chaves(self, criterio):
+        """Coluna numérica que ordena como comparar(..., criterio)"""
+        if criterio == 'nome':
+            return self.postos_nome()[1]
+        if criterio == 'quantidade':
+            return self.quantidades
+        if criterio == 'validade':
+            return self.validades
+        raise ValueError(f"Critério desconhecido: {criterio!r} (use {', '.join(self.CRITERIOS)})")
+    
+    def ordenado(self, criterio='nome'):
+        """Novo store ordenado (ordenação estável) pelo critério"""
+        return self.selecionar(self.chaves(criterio).argsort(kind='stable'))
+
+
+MAGICO_REGISTROS = b'INSUMOS\x01'
+CABECALHO_REGISTROS = struct.Struct('<8sQQQ')
+TAMANHO_CABECALHO = 64
+
+
+@lru_cache(maxsize=None)
+def dtype_registro():
+    """
+    Registro binário de largura fixa (32 bytes, little-endian, campos alinhados):
+    data e validade em microssegundos, quantidade, código do nome e preenchimento
+    """
+    np = _importar_numpy()
+    return np.dtype([('data', '<M8[us]'), ('validade', '<M8[us]'), ('quantidade', '<i8'),
+                     ('codigo', '<i4'), ('_reservado', '<i4')])
+
+
+class EscritorRegistros:
+    """
+    Grava registros no formato binário, em pedaços (InsumoStore ou iteráveis de Insumo)
+    
+    Layout do arquivo:
+        cabeçalho de 64 bytes: MAGICO_REGISTROS, número de registros,
+                               posição e tamanho do dicionário de nomes
+        registros: array de dtype_registro() a partir do byte 64
+        dicionário de nomes: lista JSON (código = posição), no fim do arquivo
+    O dicionário vai no fim para que o arquivo possa ser escrito em fluxo;
+    o cabeçalho é reescrito ao fechar.
+    """
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self.nomes = []
+        self._codigos = {}
+        self.registros = 0
+        self._arquivo = open(caminho, 'wb')
+        self._arquivo.write(bytes(TAMANHO_CABECALHO))
+    
+    def escrever(self, registros):
+        """Acrescenta um pedaço de registros"""
+        np = _importar_numpy()
+        if not isinstance(registros, InsumoStore):
+            registros = InsumoStore(registros)
+        if not len(registros):
+            return
+        traducao = np.array([self._codigo(nome) for nome in registros.nomes], dtype=np.int32)
+        bloco = np.zeros(len(registros), dtype=dtype_registro())
+        bloco['data'] = registros.datas
+        bloco['validade'] = registros.validades
+        bloco['quantidade'] = registros.quantidades
+        bloco['codigo'] = traducao[registros.codigos]
+        self._arquivo.write(bloco.tobytes())
+        self.registros += len(bloco)
+    
+    def _codigo(self, nome):
+        if nome not in self._codigos:
+            self._codigos[nome] = len(self.nomes)
+            self.nomes.append(nome)
+        return self._codigos[nome]
+    
+    def fechar(self):
+        if self._arquivo.closed:
+            return
+        nomes = json.dumps(self.nomes, ensure_ascii=False).encode('utf-8')
+        posicao = self._arquivo.tell()
+        self._arquivo.write(nomes)
+        self._arquivo.seek(0)
+        self._arquivo.write(CABECALHO_REGISTROS.pack(MAGICO_REGISTROS, self.registros, posicao, len(nomes)))
+        self._arquivo.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *excecao):
+        self.fechar()
+
+
+def gravar_registros(caminho, registros):
+    """Grava um InsumoStore ou lista de Insumo no formato binário; retorna quantos registros"""
+    with EscritorRegistros(caminho) as escritor:
+        escritor.escrever(registros)
+    return escritor.registros
+
+
+def abrir_registros(caminho):
+    """
+    Abre um arquivo binário de registros como InsumoStore, sem copiar nem converter
+    
+    As colunas são visões (somente leitura) de um numpy.memmap: abrir custa só a leitura
+    do cabeçalho e do dicionário de nomes, as páginas vêm do disco sob demanda e ficam
+    no cache de páginas do sistema, compartilhadas entre processos que abrem o mesmo arquivo.
+    Acrescentar registros ao store copia as colunas para a memória antes.
+    """
+    np = _importar_numpy()
+    with open(caminho, 'rb') as arquivo:
+        magico, quantidade, posicao_nomes, tamanho_nomes = CABECALHO_REGISTROS.unpack(
+            arquivo.read(CABECALHO_REGISTROS.size))
+        if magico != MAGICO_REGISTROS:
+            raise ValueError(f"{caminho} não é um arquivo de registros de insumos")
+        arquivo.seek(posicao_nomes)
+        nomes = json.loads(arquivo.read(tamanho_nomes).decode('utf-8'))
+    
+    if quantidade:
+        registros = np.memmap(caminho, dtype=dtype_registro(), mode='r',
+                              offset=TAMANHO_CABECALHO, shape=(quantidade,))
+    else:
+        registros = np.zeros(0, dtype=dtype_registro())
+    return InsumoStore.de_colunas(nomes, registros['codigo'], registros['quantidade'],
+                                  registros['data'], registros['validade'])
+
+
+COLUNAS_INGESTAO = ('nome', 'quantidade', 'data', 'validade')
+TAMANHO_PEDACO_INGESTAO = 10_000
+
+
+class RegistroInvalido(ValueError):
+    """Linha de exportação que não vira um Insumo válido"""
+
+
+def ler_linhas(caminho, encoding='utf-8'):
+    """Estágio 1: linhas do arquivo, uma por vez (leitura com buffer, memória constante); '-' lê a entrada padrão"""
+    if caminho == '-':
+        yield from sys.stdin
+        return
+    with open(caminho, encoding=encoding, newline='') as arquivo:
+        yield from arquivo
+
+
+@lru_cache(maxsize=4096)
+def interpretar_data(texto, formato=None):
+    """
+    Texto -> datetime, com cache (exportações diárias repetem poucas datas)
+    Caminho rápido: ISO 8601 (datetime.fromisoformat, em C); senão strptime com `formato`
+    """
+    texto = texto.strip()
+    if formato is None or (len(texto) >= 10 and texto[4:5] == '-' and texto[7:8] == '-'):
+        try:
+            return datetime.fromisoformat(texto)
+        except ValueError:
+            if formato is None:
+                raise RegistroInvalido(f"Data inválida: {texto!r}") from None
+    try:
+        return datetime.strptime(texto, formato)
+    except ValueError:
+        raise RegistroInvalido(f"Data inválida: {texto!r} (formato {formato})") from None
+
+
+def _inteiro(valor):
+    """int a partir de int, float sem parte fracionária ou texto; o resto é ValueError"""
+    if isinstance(valor, bool):
+        raise ValueError(f"não é inteiro: {valor!r}")
+    if isinstance(valor, float):
+        if not valor.is_integer():
+            raise ValueError(f"não é inteiro: {valor!r}")
+        return int(valor)
+    if isinstance(valor, (int, str)):
+        return int(valor)
+    raise ValueError(f"não é inteiro: {valor!r}")
+
+
+def _campos_para_tupla(campos, formato_data):
+    """(nome, quantidade, data, validade) a partir de um dict; validade em data ou em dias"""
+    try:
+        nome = campos['nome']
+        if not isinstance(nome, str):
+            raise RegistroInvalido(f"Nome não é texto: {campos!r}")
+        quantidade = _inteiro(campos['quantidade'])
+        data = interpretar_data(str(campos['data']), formato_data)
+        validade = campos.get('validade')
+        if validade is None or validade == '':
+            validade = data + timedelta(days=_inteiro(campos['validade_dias']))
+        elif isinstance(validade, (int, float)) or str(validade).strip().isdigit():
+            validade = data + timedelta(days=_inteiro(validade))
+        else:
+            validade = interpretar_data(str(validade), formato_data)
+    except (KeyError, TypeError, ValueError) as erro:
+        if isinstance(erro, RegistroInvalido):
+            raise
+        raise RegistroInvalido(f"Registro inválido: {campos!r} ({erro})") from None
+    return nome, quantidade, data, validade
+
+
+def _objeto_jsonl(linha):
+    """Objeto JSON de uma linha; linha malformada ou que não é objeto vira RegistroInvalido"""
+    try:
+        objeto = json.loads(linha)
+    except json.JSONDecodeError as erro:
+        raise RegistroInvalido(f"JSON inválido: {linha.strip()!r} ({erro})") from None
+    if not isinstance(objeto, dict):
+        raise RegistroInvalido(f"Registro não é um objeto JSON: {linha.strip()!r}")
+    return objeto
+
+
+def interpretar_registros(linhas, formato='csv', formato_data=None, colunas=None, erros=None):
+    """
+    Estágio 2: linhas -> tuplas (nome, quantidade, data, validade)
+    csv: a primeira linha é o cabeçalho (ou informe `colunas`); jsonl: um objeto por linha
+    Linhas que não se interpretam vão para `erros` (lista) e são puladas
+    """
+    if formato == 'csv':
+        leitor = csv.reader(linhas)
+        if colunas is None:
+            colunas = next(leitor, None)
+            if colunas is None:
+                return
+            colunas = [coluna.strip() for coluna in colunas]
+        campos = (dict(zip(colunas, valores)) for valores in leitor if valores)
+    elif formato == 'jsonl':
+        campos = (linha for linha in linhas if linha.strip())
+    else:
+        raise ValueError(f"Formato desconhecido: {formato!r} (use csv ou jsonl)")
+    
+    for registro in campos:
+        try:
+            if formato == 'jsonl':
+                registro = _objeto_jsonl(registro)
+            yield _campos_para_tupla(registro, formato_data)
+        except RegistroInvalido as erro:
+            if erros is not None:
+                erros.append(str(erro))
+
+
+def validar_registros(registros, erros=None):
+    """Estágio 3: descarta nome vazio ou que não é texto, quantidade negativa e validade anterior à data"""
+    for nome, quantidade, data, validade in registros:
+        if not isinstance(nome, str):
+            motivo = "nome não é texto"
+        elif not nome.strip():
+            motivo = "nome vazio"
+        elif quantidade < 0:
+            motivo = f"quantidade negativa ({quantidade})"
+        elif validade < data:
+            motivo = "validade anterior à data"
+        else:
+            yield nome, quantidade, data, validade
+            continue
+        if erros is not None:
+            erros.append(f"{motivo}: {nome!r}")
+
+
+def normalizar_registros(registros):
+    """
+    Estágio 4: unifica a grafia dos nomes e monta os Insumo
+    Espaços extras são removidos e nomes iguais por normalizar_nome() (maiúsculas, acentos)
+    passam a usar a primeira grafia vista
+    """
+    grafias = {}
+    for nome, quantidade, data, validade in registros:
+        nome = ' '.join(nome.split())
+        nome = grafias.setdefault(normalizar_nome(nome), nome)
+        yield Insumo.com_validade(nome, quantidade, data, validade)
+
+
+def em_pedacos(itens, tamanho=TAMANHO_PEDACO_INGESTAO):
+    """Agrupa um fluxo em listas de até `tamanho` itens"""
+    itens = iter(itens)
+    while True:
+        pedaco = list(islice(itens, tamanho))
+        if not pedaco:
+            return
+        yield pedaco
+
+
+def _interpretar_pedaco(linhas, formato, formato_data, colunas):
+    """Executado em cada processo: interpreta um pedaço de linhas cruas"""
+    erros = []
+    registros = list(interpretar_registros(linhas, formato, formato_data, colunas, erros))
+    return registros, erros
+
+
+def interpretar_em_paralelo(linhas, formato='csv', formato_data=None, processos=None,
+                            tamanho_pedaco=TAMANHO_PEDACO_INGESTAO, erros=None):
+    """
+    Estágio 2 num pool de processos, mantendo a ordem das linhas
+    No máximo 2 pedaços por processo ficam em andamento, então a memória continua limitada
+    (no csv, cada registro precisa estar numa única linha)
+    """
+    linhas = iter(linhas)
+    colunas = None
+    if formato == 'csv':
+        cabecalho = next(linhas, None)
+        if cabecalho is None:
+            return
+        colunas = [coluna.strip() for coluna in next(csv.reader([cabecalho]))]
+    processos = processos or os.cpu_count() or 1
+    
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=processos) as executor:
+        pendentes = deque()
+        for pedaco in em_pedacos(linhas, tamanho_pedaco):
+            pendentes.append(executor.submit(_interpretar_pedaco, pedaco, formato, formato_data, colunas))
+            if len(pendentes) >= 2 * processos:
+                yield from _coletar_pedaco(pendentes.popleft(), erros)
+        while pendentes:
+            yield from _coletar_pedaco(pendentes.popleft(), erros)
+
+
+def _coletar_pedaco(futuro, erros):
+    registros, erros_pedaco = futuro.result()
+    if erros is not None:
+        erros.extend(erros_pedaco)
+    return registros
+
+
+def destino(objeto):
+    """
+    Função que entrega um pedaço (lista de Insumo) à estrutura:
+    Fila -> enfileirar_lote, InsumoStore -> estender, EscritorRegistros -> escrever,
+    FilaValidade -> inserir_lote, índices -> inserir um a um; funções são usadas como estão
+    """
+    if isinstance(objeto, Fila):
+        return objeto.enfileirar_lote
+    if isinstance(objeto, InsumoStore):
+        return objeto.estender
+    if isinstance(objeto, EscritorRegistros):
+        return objeto.escrever
+    if isinstance(objeto, FilaValidade):
+        return objeto.inserir_lote
+    if isinstance(objeto, (IndiceInsumos, IndiceOrdenado)):
+        return lambda pedaco: [objeto.inserir(insumo) for insumo in pedaco]
+    if callable(objeto):
+        return objeto
+    raise TypeError(f"Destino não suportado: {type(objeto).__name__}")
+
+
+def fluxo_registros(caminho, formato=None, formato_data=None, processos=1,
+                    tamanho_pedaco=TAMANHO_PEDACO_INGESTAO, erros=None):
+    """
+    Insumo lidos de uma exportação CSV ou JSONL, um a um: ler -> interpretar -> validar -> normalizar
+    formato: 'csv' ou 'jsonl' (padrão: pela extensão); processos > 1 interpreta num pool
+    """
+    if formato is None:
+        formato = 'jsonl' if str(caminho).endswith(('.jsonl', '.ndjson')) else 'csv'
+    linhas = ler_linhas(caminho)
+    if processos and processos > 1:
+        registros = interpretar_em_paralelo(linhas, formato, formato_data, processos, tamanho_pedaco, erros)
+    else:
+        registros = interpretar_registros(linhas, formato, formato_data, erros=erros)
+    return normalizar_registros(validar_registros(registros, erros))
+
+
+def ingerir(caminho, destinos=(), formato=None, formato_data=None, tamanho_pedaco=TAMANHO_PEDACO_INGESTAO,
+            processos=1, ao_progresso=None):
+    """
+    Carrega uma exportação CSV ou JSONL em fluxo (fluxo_registros), entregando pedaços
+    de `tamanho_pedaco` Insumo a cada destino (ver destino())
+    
+    A memória fica limitada ao pedaço (nenhuma lista com o arquivo inteiro é montada).
+    ao_progresso(relatorio) é chamado após cada pedaço.
+    Retorna o relatório: aceitos, rejeitados, erros (até 100), segundos e registros_por_segundo
+    """
+    entregar = [destino(objeto) for objeto in destinos]
+    erros = []
+    
+    inicio = perf_counter()
+    registros = fluxo_registros(caminho, formato, formato_data, processos, tamanho_pedaco, erros)
+    
+    relatorio = {'aceitos': 0, 'rejeitados': 0, 'erros': [], 'segundos': 0.0, 'registros_por_segundo': 0.0}
+    
+    def atualizar():
+        relatorio['rejeitados'] += len(erros)
+        if len(relatorio['erros']) < 100:
+            relatorio['erros'].extend(erros[:100 - len(relatorio['erros'])])
+        erros.clear()
+        relatorio['segundos'] = perf_counter() - inicio
+        relatorio['registros_por_segundo'] = relatorio['aceitos'] / relatorio['segundos'] if relatorio['segundos'] else 0.0
+    
+    for pedaco in em_pedacos(registros, tamanho_pedaco):
+        for entregar_pedaco in entregar:
+            entregar_pedaco(pedaco)
+        relatorio['aceitos'] += len(pedaco)
+        atualizar()
+        if ao_progresso is not None:
+            ao_progresso(relatorio)
+    atualizar()
+    return relatorio
+
+
+class FilaCheia(Exception):
+    """Fila com max_tamanho sem espaço (rejeitada ou tempo de espera esgotado)"""
+
+
+class FilaVazia(Exception):
+    """Nenhum item chegou dentro do tempo de espera de get()"""
+
+
 class Fila:
-    """Implementação de Fila para registrar consumo em ordem cronológica"""
-    def __init__(self):
-        self.items = []
+    """
+    Implementação de Fila para registrar consumo em ordem cronológica
     
-    def enfileirar(self, item):
+    Sobre collections.deque: enfileirar e desenfileirar em O(1), também em lote.
+    max_tamanho limita a fila; quando cheia, enfileirar levanta FilaCheia ou,
+    com bloquear=True, espera até outro thread desenfileirar (timeout opcional).
+    Iterar sobre a fila não copia os itens.
+    """
+    def __init__(self, max_tamanho=None, bloquear=False):
+        if max_tamanho is not None and max_tamanho < 1:
+            raise ValueError("max_tamanho deve ser >= 1")
+        self.items = deque()
+        self.max_tamanho = max_tamanho
+        self._espaco = threading.Condition() if max_tamanho is not None and bloquear else None
+    
+    def enfileirar(self, item, timeout=None):
         """Adiciona item no final da fila"""
-        self.items.append(item)
+        if self.max_tamanho is None:
+            self.items.append(item)
+        elif self._espaco is None:
+            if len(self.items) >= self.max_tamanho:
+                raise FilaCheia(f"Fila cheia ({self.max_tamanho} itens)")
+            self.items.append(item)
+        else:
+            with self._espaco:
+                if not self._espaco.wait_for(lambda: len(self.items) < self.max_tamanho, timeout):
+                    raise FilaCheia(f"Fila cheia ({self.max_tamanho} itens) após {timeout}s")
+                self.items.append(item)
+    
+    def enfileirar_lote(self, itens, timeout=None):
+        """
+        Adiciona vários itens de uma vez e retorna quantos entraram
+        Sem bloqueio, um lote que não cabe inteiro é rejeitado (FilaCheia) sem adicionar nada;
+        com bloqueio, entra aos pedaços conforme abre espaço
+        """
+        if self.max_tamanho is None:
+            antes = len(self.items)
+            self.items.extend(itens)
+            return len(self.items) - antes
+        itens = list(itens)
+        if self._espaco is None:
+            if len(self.items) + len(itens) > self.max_tamanho:
+                raise FilaCheia(f"Lote de {len(itens)} não cabe na fila ({len(self.items)}/{self.max_tamanho})")
+            self.items.extend(itens)
+            return len(itens)
+        inicio = 0
+        with self._espaco:
+            while inicio < len(itens):
+                if not self._espaco.wait_for(lambda: len(self.items) < self.max_tamanho, timeout):
+                    raise FilaCheia(f"Fila cheia após {timeout}s ({inicio} de {len(itens)} itens enfileirados)")
+                fim = inicio + self.max_tamanho - len(self.items)
+                self.items.extend(itens[inicio:fim])
+                inicio = fim
+        return len(itens)
     
     def desenfileirar(self):
-        """Remove e retorna o primeiro item da fila"""
-        if not self.esta_vazia():
-            return self.items.pop(0)
-        return None
+        """Remove e retorna o primeiro item da fila (None se vazia)"""
+        if self._espaco is None:
+            return self.items.popleft() if self.items else None
+        with self._espaco:
+            if not self.items:
+                return None
+            item = self.items.popleft()
+            self._espaco.notify()
+            return item
+    
+    def desenfileirar_lote(self, quantidade=None):
+        """Remove e retorna até `quantidade` itens do início (todos, se None)"""
+        if self._espaco is None:
+            return self._retirar(quantidade)
+        with self._espaco:
+            lote = self._retirar(quantidade)
+            if lote:
+                self._espaco.notify_all()
+            return lote
+    
+    def _retirar(self, quantidade):
+        if quantidade is None or quantidade >= len(self.items):
+            lote = list(self.items)
+            self.items.clear()
+            return lote
+        popleft = self.items.popleft
+        return [popleft() for _ in range(quantidade)]
     
     def esta_vazia(self):
         return len(self.items) == 0
@@ -45,7 +684,14 @@ class Fila:
         return len(self.items)
     
     def ver_todos(self):
-        return self.items.copy()
+        """Cópia dos itens em lista (para percorrer sem copiar, itere sobre a fila)"""
+        return list(self.items)
+    
+    def __len__(self):
+        return len(self.items)
+    
+    def __iter__(self):
+        return iter(self.items)
 
 
 class Pilha:
@@ -79,8 +725,451 @@ class Pilha:
         return self.items.copy()
 
 
+class FilaValidade:
+    """
+    Fila FEFO (first expired, first out): heap binário ordenado por validade
+    
+    Entrega primeiro o lote que vence antes, sem reordenar tudo a cada mudança:
+    - inserir() e retirar() em O(log n); peek() consulta sem remover
+    - expirar_ate(data) retira os k lotes vencidos em O(k log n)
+    - remover(insumo) marca o lote como consumido fora de ordem (remoção preguiçosa);
+      as entradas mortas são descartadas ao chegar ao topo ou numa compactação
+    Empates de validade saem na ordem de chegada.
+    """
+    def __init__(self, insumos=()):
+        self._heap = []
+        self._entradas = {}
+        self._sequencia = 0
+        self.inserir_lote(insumos)
+    
+    def inserir(self, insumo):
+        """Adiciona um lote"""
+        entrada = self._nova_entrada(insumo)
+        heapq.heappush(self._heap, entrada)
+    
+    def inserir_lote(self, insumos):
+        """
+        Adiciona vários lotes; um lote grande refaz o heap de uma vez em O(n)
+        Tudo ou nada: um lote repetido (já na fila ou duas vezes no lote) levanta ValueError sem mudar a fila
+        """
+        insumos = list(insumos)
+        vistos = set()
+        for insumo in insumos:
+            if id(insumo) in self._entradas or id(insumo) in vistos:
+                raise ValueError(f"Lote já está na fila: {insumo}")
+            vistos.add(id(insumo))
+        novas = [self._nova_entrada(insumo) for insumo in insumos]
+        if len(novas) > len(self._heap):
+            self._heap.extend(novas)
+            heapq.heapify(self._heap)
+        else:
+            for entrada in novas:
+                heapq.heappush(self._heap, entrada)
+    
+    def _nova_entrada(self, insumo):
+        if id(insumo) in self._entradas:
+            raise ValueError(f"Lote já está na fila: {insumo}")
+        entrada = [insumo.validade, self._sequencia, insumo]
+        self._sequencia += 1
+        self._entradas[id(insumo)] = entrada
+        return entrada
+    
+    def _descartar_mortos(self):
+        while self._heap and self._heap[0][2] is None:
+            heapq.heappop(self._heap)
+    
+    def peek(self):
+        """Lote com a validade mais próxima, sem remover (None se vazia)"""
+        self._descartar_mortos()
+        return self._heap[0][2] if self._heap else None
+    
+    def retirar(self):
+        """Remove e retorna o lote com a validade mais próxima (None se vazia)"""
+        self._descartar_mortos()
+        if not self._heap:
+            return None
+        insumo = heapq.heappop(self._heap)[2]
+        del self._entradas[id(insumo)]
+        return insumo
+    
+    def expirar_ate(self, data):
+        """Remove e retorna, em ordem de validade, todos os lotes com validade <= data"""
+        vencidos = []
+        while True:
+            self._descartar_mortos()
+            if not self._heap or self._heap[0][0] > data:
+                return vencidos
+            insumo = heapq.heappop(self._heap)[2]
+            del self._entradas[id(insumo)]
+            vencidos.append(insumo)
+    
+    def remover(self, insumo):
+        """Marca um lote consumido fora de ordem como removido; False se não estava na fila"""
+        entrada = self._entradas.pop(id(insumo), None)
+        if entrada is None:
+            return False
+        entrada[2] = None
+        if len(self._heap) > 2 * len(self._entradas) + 64:
+            self._compactar()
+        return True
+    
+    def _compactar(self):
+        self._heap = [entrada for entrada in self._heap if entrada[2] is not None]
+        heapq.heapify(self._heap)
+    
+    def esta_vazia(self):
+        return not self._entradas
+    
+    def tamanho(self):
+        return len(self._entradas)
+    
+    def __len__(self):
+        return len(self._entradas)
+    
+    def __contains__(self, insumo):
+        return id(insumo) in self._entradas
+    
+    def __iter__(self):
+        """Lotes presentes, sem ordem definida (use retirar() para a ordem FEFO)"""
+        return (entrada[2] for entrada in self._heap if entrada[2] is not None)
+
+
+class _EsperaConcorrente:
+    """
+    get(timeout) bloqueante para estruturas sobre deque/list, sem trava no caminho comum
+    
+    append, pop e popleft de deque e list são atômicos no CPython, então produtores e
+    consumidores que não precisam esperar nunca tocam na trava. Um consumidor só pega a
+    trava quando a estrutura está vazia e se registra em _esperando; o produtor só
+    notifica quando há alguém registrado.
+    """
+    
+    def _iniciar_espera(self):
+        self._trava = threading.Lock()
+        self._nao_vazia = threading.Condition(self._trava)
+        self._esperando = 0
+    
+    def _avisar(self, todos=False):
+        if self._esperando:
+            with self._trava:
+                if todos:
+                    self._nao_vazia.notify_all()
+                else:
+                    self._nao_vazia.notify()
+    
+    def _retirar_ou_none(self):
+        try:
+            return True, self._remover()
+        except IndexError:
+            return False, None
+    
+    def get(self, timeout=None):
+        """Remove e retorna o próximo item, esperando até `timeout` segundos (FilaVazia ao esgotar)"""
+        achou, item = self._retirar_ou_none()
+        if achou:
+            return item
+        limite = None if timeout is None else monotonic() + timeout
+        with self._trava:
+            self._esperando += 1
+            try:
+                while True:
+                    achou, item = self._retirar_ou_none()
+                    if achou:
+                        return item
+                    restante = None if limite is None else limite - monotonic()
+                    if restante is not None and restante <= 0:
+                        raise FilaVazia(f"Nenhum item em {timeout}s")
+                    self._nao_vazia.wait(restante)
+            finally:
+                self._esperando -= 1
+
+
+class FilaConcorrente(_EsperaConcorrente, Fila):
+    """
+    Fila para vários threads produtores e consumidores (sem a trava global em volta)
+    
+    Sem max_tamanho, enfileirar e desenfileirar não usam trava (deque é atômico);
+    get(timeout) espera por itens. Com max_tamanho, a verificação de espaço e a inserção
+    acontecem sob a trava: enfileirar espera (bloquear=True, padrão) ou levanta FilaCheia.
+    """
+    def __init__(self, max_tamanho=None, bloquear=True):
+        super().__init__(max_tamanho)
+        self._iniciar_espera()
+        self.bloquear = bloquear
+        self._espaco = threading.Condition(self._trava) if max_tamanho is not None else None
+        self._remover = self.items.popleft
+    
+    def _tem_espaco(self):
+        return len(self.items) < self.max_tamanho
+    
+    def enfileirar(self, item, timeout=None):
+        """Adiciona item no final da fila e acorda um consumidor em espera"""
+        if self._espaco is None:
+            self.items.append(item)
+        else:
+            with self._trava:
+                if not self._espaco.wait_for(self._tem_espaco, timeout if self.bloquear else 0):
+                    raise FilaCheia(f"Fila cheia ({self.max_tamanho} itens)")
+                self.items.append(item)
+        self._avisar()
+    
+    def enfileirar_lote(self, itens, timeout=None):
+        """Adiciona vários itens (sem bloqueio, um lote que não cabe inteiro é rejeitado)"""
+        itens = list(itens)
+        if self._espaco is None:
+            self.items.extend(itens)
+        elif not self.bloquear:
+            with self._trava:
+                if len(self.items) + len(itens) > self.max_tamanho:
+                    raise FilaCheia(f"Lote de {len(itens)} não cabe na fila ({len(self.items)}/{self.max_tamanho})")
+                self.items.extend(itens)
+        else:
+            inicio = 0
+            with self._trava:
+                while inicio < len(itens):
+                    if not self._espaco.wait_for(self._tem_espaco, timeout):
+                        raise FilaCheia(f"Fila cheia após {timeout}s ({inicio} de {len(itens)} itens enfileirados)")
+                    fim = inicio + self.max_tamanho - len(self.items)
+                    self.items.extend(itens[inicio:fim])
+                    inicio = fim
+                    self._nao_vazia.notify_all()
+        self._avisar(todos=True)
+        return len(itens)
+    
+    def desenfileirar(self):
+        """Remove e retorna o primeiro item sem esperar (None se vazia)"""
+        _, item = self._retirar_ou_none()
+        self._liberar_espaco()
+        return item
+    
+    def get(self, timeout=None):
+        item = super().get(timeout)
+        self._liberar_espaco()
+        return item
+    
+    def desenfileirar_lote(self, quantidade=None):
+        """
+        Remove e retorna até `quantidade` itens do início (os presentes agora, se None), sem esperar
+        Retira item a item com popleft (atômico): com produtores e consumidores simultâneos,
+        nada se perde nem sai duas vezes
+        """
+        limite = len(self.items) if quantidade is None else quantidade
+        lote = []
+        remover = self._remover
+        try:
+            while len(lote) < limite:
+                lote.append(remover())
+        except IndexError:
+            pass
+        if lote and self._espaco is not None:
+            with self._trava:
+                self._espaco.notify_all()
+        return lote
+    
+    def _liberar_espaco(self):
+        if self._espaco is not None:
+            with self._trava:
+                self._espaco.notify()
+
+
+class PilhaConcorrente(_EsperaConcorrente, Pilha):
+    """
+    Pilha para vários threads: empilhar e desempilhar sem trava (list.append/pop são atômicos)
+    get(timeout) espera até haver um item no topo
+    """
+    def __init__(self):
+        super().__init__()
+        self._iniciar_espera()
+        self._remover = self.items.pop
+    
+    def empilhar(self, item):
+        """Adiciona item no topo da pilha e acorda um consumidor em espera"""
+        self.items.append(item)
+        self._avisar()
+    
+    def desempilhar(self):
+        """Remove e retorna o item do topo sem esperar (None se vazia)"""
+        return self._retirar_ou_none()[1]
+    
+    def topo(self):
+        """Retorna o item do topo sem remover"""
+        try:
+            return self.items[-1]
+        except IndexError:
+            return None
+
+
+class FilaAssincrona:
+    """
+    Fila para corrotinas asyncio: `await enfileirar(item)` e `await desenfileirar(timeout)`
+    
+    Usa um único laço de eventos (não é para threads; para isso, FilaConcorrente).
+    Com max_tamanho, enfileirar espera por espaço; desenfileirar espera por itens e
+    levanta FilaVazia se `timeout` esgotar.
+    """
+    def __init__(self, max_tamanho=None):
+        if max_tamanho is not None and max_tamanho < 1:
+            raise ValueError("max_tamanho deve ser >= 1")
+        self.items = deque()
+        self.max_tamanho = max_tamanho
+        import asyncio
+        self._mudou = asyncio.Condition()
+    
+    def _tem_espaco(self):
+        return self.max_tamanho is None or len(self.items) < self.max_tamanho
+    
+    async def enfileirar(self, item):
+        """Adiciona item no final, esperando espaço se a fila for limitada"""
+        async with self._mudou:
+            await self._mudou.wait_for(self._tem_espaco)
+            self.items.append(item)
+            self._mudou.notify_all()
+    
+    async def desenfileirar(self, timeout=None):
+        """Remove e retorna o primeiro item, esperando até `timeout` segundos"""
+        import asyncio
+        async with self._mudou:
+            try:
+                await asyncio.wait_for(self._mudou.wait_for(lambda: self.items), timeout)
+            except asyncio.TimeoutError:
+                raise FilaVazia(f"Nenhum item em {timeout}s") from None
+            item = self.items.popleft()
+            self._mudou.notify_all()
+            return item
+    
+    def esta_vazia(self):
+        return len(self.items) == 0
+    
+    def tamanho(self):
+        return len(self.items)
+    
+    def __len__(self):
+        return len(self.items)
+    
+    def __iter__(self):
+        return iter(self.items)
+
+
+def medir_vazao_filas(produtores=4, itens_por_produtor=50_000, consumidores=1):
+    """
+    Vazão (itens/s) com vários threads produtores e consumidores:
+    Fila comum atrás de uma trava global (Condition: consumidores dormem até haver item,
+    sem girar segurando a trava) contra FilaConcorrente
+    Retorna {nome: itens por segundo}
+    """
+    total = produtores * itens_por_produtor
+    
+    def rodar(produzir, consumir):
+        recebidos = [0] * consumidores
+        
+        def consumidor(indice, cota):
+            for _ in range(cota):
+                consumir()
+            recebidos[indice] = cota
+        
+        cotas = [total // consumidores + (i < total % consumidores) for i in range(consumidores)]
+        threads = [threading.Thread(target=produzir) for _ in range(produtores)]
+        threads += [threading.Thread(target=consumidor, args=(i, cota)) for i, cota in enumerate(cotas)]
+        inicio = perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        decorrido = perf_counter() - inicio
+        if sum(recebidos) != total:
+            raise AssertionError("itens perdidos")
+        return total / decorrido
+    
+    fila, trava = Fila(), threading.Condition()
+    
+    def produzir_global():
+        for i in range(itens_por_produtor):
+            with trava:
+                fila.enfileirar(i)
+                trava.notify()
+    
+    def consumir_global():
+        with trava:
+            trava.wait_for(lambda: not fila.esta_vazia())
+            return fila.desenfileirar()
+    
+    concorrente = FilaConcorrente()
+    
+    def produzir_concorrente():
+        enfileirar = concorrente.enfileirar
+        for i in range(itens_por_produtor):
+            enfileirar(i)
+    
+    return {
+        'Fila + trava global': rodar(produzir_global, consumir_global),
+        'FilaConcorrente': rodar(produzir_concorrente, concorrente.get),
+    }
+
+
+def conferir_filas_concorrentes(produtores=4, consumidores=4, itens_por_produtor=200_000, max_tamanho=None):
+    """
+    Confere FilaConcorrente com vários produtores e consumidores ao mesmo tempo
+    (enfileirar e enfileirar_lote; desenfileirar_lote com e sem quantidade, desenfileirar e get):
+    cada item enfileirado tem de sair exatamente uma vez
+    Retorna a lista de divergências (vazia quando tudo bate)
+    """
+    fila = FilaConcorrente(max_tamanho)
+    recebidos = [[] for _ in range(consumidores)]
+    terminou = threading.Event()
+    
+    def produzir(base):
+        for item in range(base, base + itens_por_produtor):
+            if item % 3:
+                fila.enfileirar(item)
+            else:
+                fila.enfileirar_lote([item])
+    
+    def consumir(indice):
+        saida, modo = recebidos[indice], indice % 4
+        while True:
+            if modo == 0:
+                lote = fila.desenfileirar_lote()
+            elif modo == 1:
+                lote = fila.desenfileirar_lote(64)
+            elif modo == 2:
+                item = fila.desenfileirar()
+                lote = [] if item is None else [item]
+            else:
+                try:
+                    lote = [fila.get(0.01)]
+                except FilaVazia:
+                    lote = []
+            if lote:
+                saida.extend(lote)
+            elif terminou.is_set() and not len(fila):
+                return
+    
+    threads_produtoras = [threading.Thread(target=produzir, args=(i * itens_por_produtor,)) for i in range(produtores)]
+    threads_consumidoras = [threading.Thread(target=consumir, args=(i,)) for i in range(consumidores)]
+    for thread in threads_produtoras + threads_consumidoras:
+        thread.start()
+    for thread in threads_produtoras:
+        thread.join()
+    terminou.set()
+    for thread in threads_consumidoras:
+        thread.join()
+    
+    todos = [item for saida in recebidos for item in saida]
+    distintos = set(todos)
+    divergencias = []
+    perdidos = produtores * itens_por_produtor - len(distintos & set(range(produtores * itens_por_produtor)))
+    if perdidos:
+        divergencias.append(f"{perdidos} itens perdidos")
+    if len(todos) != len(distintos):
+        divergencias.append(f"{len(todos) - len(distintos)} itens entregues mais de uma vez")
+    return divergencias
+
+
 def busca_sequencial(lista, nome_insumo):
-    """Busca sequencial por nome do insumo"""
+    """Busca sequencial por nome do insumo (lista de Insumo ou InsumoStore)"""
+    if isinstance(lista, InsumoStore):
+        return [(int(i), lista[i]) for i in lista.posicoes_nome(nome_insumo)]
+    
     resultados = []
     for i, insumo in enumerate(lista):
         if insumo.nome.lower() == nome_insumo.lower():
@@ -88,92 +1177,921 @@ def busca_sequencial(lista, nome_insumo):
     return resultados
 
 
-def busca_binaria(lista_ordenada, nome_insumo):
-    """Busca binária por nome do insumo (lista deve estar ordenada por nome)"""
-    esquerda, direita = 0, len(lista_ordenada) - 1
+@lru_cache(maxsize=4096)
+def normalizar_nome(nome):
+    """Forma canônica de um nome para comparação: casefold e sem acentos"""
+    decomposto = unicodedata.normalize('NFKD', nome.casefold())
+    return ''.join(c for c in decomposto if not unicodedata.combining(c))
+
+
+class IndiceInsumos:
+    """
+    Índices sobre uma coleção de registros de consumo
+    
+    - hash: nome normalizado (normalizar_nome) -> posições, busca O(1)
+    - ordenados: listas (validade, posição) e (data, posição) para consultas por intervalo em O(log n + k)
+    
+    As posições são estáveis: remover deixa a posição vaga em vez de deslocar as seguintes.
+    Os resultados têm o mesmo formato (posicao, insumo) de busca_sequencial.
+    """
     
-    while esquerda <= direita:
+    def __init__(self, registros=()):
+        self.registros = []
+        self._ativos = 0
+        self._por_nome = {}
+        for insumo in registros:
+            posicao = len(self.registros)
+            self.registros.append(insumo)
+            self._por_nome.setdefault(normalizar_nome(insumo.nome), {})[posicao] = None
+        self._ativos = len(self.registros)
+        self._por_validade = sorted((insumo.validade, posicao) for posicao, insumo in enumerate(self.registros))
+        self._por_data = sorted((insumo.data, posicao) for posicao, insumo in enumerate(self.registros))
+    
+    def inserir(self, insumo):
+        """Acrescenta um registro, atualiza os índices e retorna a posição dele"""
+        posicao = len(self.registros)
+        self.registros.append(insumo)
+        self._ativos += 1
+        self._por_nome.setdefault(normalizar_nome(insumo.nome), {})[posicao] = None
+        insort(self._por_validade, (insumo.validade, posicao))
+        insort(self._por_data, (insumo.data, posicao))
+        return posicao
+    
+    def remover(self, posicao):
+        """Remove o registro da posição (e dos índices) e o retorna"""
+        insumo = self.registros[posicao]
+        if insumo is None:
+            raise KeyError(f"Posição {posicao} já removida")
+        
+        self.registros[posicao] = None
+        self._ativos -= 1
+        chave = normalizar_nome(insumo.nome)
+        del self._por_nome[chave][posicao]
+        if not self._por_nome[chave]:
+            del self._por_nome[chave]
+        for indice, valor in ((self._por_validade, insumo.validade), (self._por_data, insumo.data)):
+            del indice[bisect_left(indice, (valor, posicao))]
+        return insumo
+    
+    def buscar(self, nome):
+        """Todos os registros do insumo: [(posicao, insumo)]"""
+        return [(posicao, self.registros[posicao]) for posicao in self._por_nome.get(normalizar_nome(nome), ())]
+    
+    def por_validade(self, inicio=None, fim=None):
+        """Registros com inicio <= validade <= fim, em ordem de validade"""
+        return self._intervalo(self._por_validade, inicio, fim)
+    
+    def por_data(self, inicio=None, fim=None):
+        """Registros com inicio <= data <= fim, em ordem de data"""
+        return self._intervalo(self._por_data, inicio, fim)
+    
+    def _intervalo(self, indice, inicio, fim):
+        esquerda = 0 if inicio is None else bisect_left(indice, (inicio,))
+        direita = len(indice) if fim is None else bisect_right(indice, (fim, len(self.registros)))
+        return [(posicao, self.registros[posicao]) for _, posicao in indice[esquerda:direita]]
+    
+    def __len__(self):
+        return self._ativos
+    
+    def __iter__(self):
+        for posicao, insumo in enumerate(self.registros):
+            if insumo is not None:
+                yield posicao, insumo
+
+
+def busca_binaria(lista_ordenada, nome_insumo):
+    """
+    Busca binária por nome do insumo (lista ou InsumoStore, deve estar ordenada por nome)
+    Acha a primeira ocorrência (limite inferior) e percorre a sequência de iguais: O(log n + k)
+    """
+    if isinstance(lista_ordenada, IndiceOrdenado):
+        return lista_ordenada.buscar(nome_insumo)
+    if isinstance(lista_ordenada, InsumoStore):
+        postos, chaves = lista_ordenada.postos_nome()
+        posto = postos.get(nome_insumo.lower())
+        if posto is None:
+            return []
+        inicio, fim = chaves.searchsorted(posto, 'left'), chaves.searchsorted(posto, 'right')
+        return [(i, lista_ordenada[i]) for i in range(int(inicio), int(fim))]
+    
+    nome_busca = nome_insumo.lower()
+    esquerda, direita = 0, len(lista_ordenada)
+    
+    while esquerda < direita:
         meio = (esquerda + direita) // 2
-        nome_meio = lista_ordenada[meio].nome.lower()
-        nome_busca = nome_insumo.lower()
-        
-        if nome_meio == nome_busca:
-            resultados = [(meio, lista_ordenada[meio])]
-            i = meio - 1
-            while i >= 0 and lista_ordenada[i].nome.lower() == nome_busca:
-                resultados.insert(0, (i, lista_ordenada[i]))
-                i -= 1
-            i = meio + 1
-            while i < len(lista_ordenada) and lista_ordenada[i].nome.lower() == nome_busca:
-                resultados.append((i, lista_ordenada[i]))
-                i += 1
-            return resultados
-        elif nome_meio < nome_busca:
+        if lista_ordenada[meio].nome.lower() < nome_busca:
             esquerda = meio + 1
         else:
-            direita = meio - 1
+            direita = meio
+    
+    resultados = []
+    i = esquerda
+    while i < len(lista_ordenada) and lista_ordenada[i].nome.lower() == nome_busca:
+        resultados.append((i, lista_ordenada[i]))
+        i += 1
+    return resultados
+
+
+class IndiceOrdenado:
+    """
+    Visão ordenada por nome mantida entre consultas
+    
+    Guarda as chaves em minúsculas já calculadas, lado a lado com os registros,
+    para não reordenar nem recalcular .lower() a cada busca.
+    - inserir(): bisect.insort, depois dos registros de mesmo nome (ordem estável)
+    - buscar(): todas as ocorrências com duas bisseções (limite inferior e superior), O(log n + k)
+    - prefixo(): autocompletar, todos os nomes que começam com o texto digitado
+    As posições devolvidas são as da ordem por nome, como em busca_binaria.
+    """
     
-    return []
+    def __init__(self, registros=()):
+        pares = sorted(((insumo.nome.lower(), insumo) for insumo in registros), key=lambda par: par[0])
+        self.chaves = [chave for chave, _ in pares]
+        self.registros = [insumo for _, insumo in pares]
+    
+    def inserir(self, insumo):
+        """Insere mantendo a ordem e retorna a posição do novo registro"""
+        chave = insumo.nome.lower()
+        posicao = bisect_right(self.chaves, chave)
+        self.chaves.insert(posicao, chave)
+        self.registros.insert(posicao, insumo)
+        return posicao
+    
+    def buscar(self, nome):
+        """Todas as ocorrências do nome (sem diferenciar maiúsculas): [(posicao, insumo)]"""
+        chave = nome.lower()
+        return self._faixa(bisect_left(self.chaves, chave), bisect_right(self.chaves, chave))
+    
+    def prefixo(self, texto, limite=None):
+        """Registros cujo nome começa com o texto, em ordem alfabética (no máximo `limite`)"""
+        chave = texto.lower()
+        inicio = bisect_left(self.chaves, chave)
+        fim = bisect_left(self.chaves, chave + '\U0010ffff')
+        if limite is not None:
+            fim = min(fim, inicio + limite)
+        return self._faixa(inicio, fim)
+    
+    def nomes_com_prefixo(self, texto, limite=10):
+        """Nomes distintos (grafia original do primeiro registro) que começam com o texto"""
+        nomes = {}
+        chave = texto.lower()
+        posicao = bisect_left(self.chaves, chave)
+        while posicao < len(self.chaves) and self.chaves[posicao].startswith(chave) and len(nomes) < limite:
+            nomes.setdefault(self.chaves[posicao], self.registros[posicao].nome)
+            posicao = bisect_right(self.chaves, self.chaves[posicao])
+        return list(nomes.values())
+    
+    def _faixa(self, inicio, fim):
+        return [(i, self.registros[i]) for i in range(inicio, fim)]
+    
+    def __len__(self):
+        return len(self.registros)
+    
+    def __iter__(self):
+        return iter(self.registros)
 
 
 def merge_sort(lista, criterio='nome'):
     """
     Merge Sort - Divide e conquista
-    Critérios: 'nome', 'quantidade', 'validade'
+    Critérios: 'nome', 'quantidade', 'validade' (ou uma tupla deles, ver ordenar())
+    Versão iterativa (bottom-up) sobre chaves pré-calculadas; estável e sem fatiar a lista
+    Um InsumoStore é ordenado pelas colunas (argsort estável) e volta como store
     """
-    if len(lista) <= 1:
-        return lista
-    
-    meio = len(lista) // 2
-    esquerda = merge_sort(lista[:meio], criterio)
-    direita = merge_sort(lista[meio:], criterio)
-    
-    return merge(esquerda, direita, criterio)
+    return ordenar(lista, criterio, algoritmo='merge')
 
 
 def merge(esquerda, direita, criterio):
-    """Combina duas listas ordenadas"""
+    """Combina duas listas ordenadas (nos empates fica o da esquerda: estável)"""
     resultado = []
     i = j = 0
     
     while i < len(esquerda) and j < len(direita):
-        if comparar(esquerda[i], direita[j], criterio):
-            resultado.append(esquerda[i])
-            i += 1
-        else:
+        if comparar(direita[j], esquerda[i], criterio):
             resultado.append(direita[j])
             j += 1
+        else:
+            resultado.append(esquerda[i])
+            i += 1
     
     resultado.extend(esquerda[i:])
     resultado.extend(direita[j:])
     return resultado
 
 
-def quick_sort(lista, criterio='nome'):
+def quick_sort(lista, criterio='nome'):
+    """
+    Quick Sort - Divide e conquista com pivô
+    Critérios: 'nome', 'quantidade', 'validade' (ou uma tupla deles, ver ordenar())
+    Introsort sobre uma cópia: partição de Hoare em uma passada, mediana de três,
+    heapsort se a recursão passar de 2·log2(n) e inserção nas faixas pequenas; não é estável
+    Um InsumoStore é ordenado pelas colunas e volta como store
+    """
+    return ordenar(list(lista) if not isinstance(lista, InsumoStore) else lista, criterio,
+                   algoritmo='intro', no_lugar=True)
+
+
+def comparar(insumo1, insumo2, criterio):
+    """Função auxiliar para comparar insumos por diferentes critérios"""
+    medicao = _MEDICAO.get()
+    if medicao is not None:
+        medicao.registro.incrementar('comparar_chamadas_total')
+    if criterio == 'nome':
+        return insumo1.nome.lower() < insumo2.nome.lower()
+    elif criterio == 'quantidade':
+        return insumo1.quantidade < insumo2.quantidade
+    elif criterio == 'validade':
+        return insumo1.validade < insumo2.validade
+    return False
+
+
+EXTRATORES_CHAVE = {
+    'nome': lambda insumo: insumo.nome.lower(),
+    'quantidade': lambda insumo: insumo.quantidade,
+    'validade': lambda insumo: insumo.validade,
+}
+TAMANHO_CORRIDA = 32
+ALGORITMOS_ORDENACAO = ('timsort', 'merge', 'intro')
+
+
+def _normalizar_criterios(criterios, decrescente):
+    """('nome', ...) e um bool por critério"""
+    if isinstance(criterios, str):
+        criterios = (criterios,)
+    criterios = tuple(criterios)
+    if not criterios:
+        raise ValueError("Informe ao menos um critério")
+    for criterio in criterios:
+        if criterio not in EXTRATORES_CHAVE:
+            raise ValueError(f"Critério desconhecido: {criterio!r} (use {', '.join(EXTRATORES_CHAVE)})")
+    if isinstance(decrescente, bool):
+        decrescente = (decrescente,) * len(criterios)
+    decrescente = tuple(bool(d) for d in decrescente)
+    if len(decrescente) != len(criterios):
+        raise ValueError("decrescente deve ter um valor por critério")
+    return criterios, decrescente
+
+
+def chaves_ordenacao(lista, criterios='nome', decrescente=False):
+    """
+    Chaves pré-calculadas (uma por registro) que ordenam de forma crescente como pedido
+    Um critério decrescente vira o posto negado do valor (serve para nomes e datas também);
+    vários critérios viram tuplas comparadas na ordem dada
+    """
+    criterios, decrescente = _normalizar_criterios(criterios, decrescente)
+    colunas = []
+    for criterio, invertido in zip(criterios, decrescente):
+        coluna = list(map(EXTRATORES_CHAVE[criterio], lista))
+        if invertido:
+            posto = {valor: i for i, valor in enumerate(sorted(set(coluna)))}
+            coluna = [-posto[valor] for valor in coluna]
+        colunas.append(coluna)
+    if len(colunas) == 1:
+        return _contar_comparacoes(colunas[0])
+    return _contar_comparacoes(list(zip(*colunas)))
+
+
+def ordenar(lista, criterios='nome', decrescente=False, algoritmo='timsort', no_lugar=False):
+    """
+    Ordena insumos calculando cada chave uma única vez (decorar-ordenar-desdecorar)
+    
+    criterios: 'nome' ou uma tupla como ('nome', 'validade')
+    decrescente: bool para todos ou um bool por critério, ex. (False, True)
+    algoritmo: 'timsort' (list.sort, estável), 'merge' (merge sort iterativo, estável)
+               ou 'intro' (introsort, não estável)
+    no_lugar: reordena a própria lista e a retorna; senão retorna uma lista nova
+    Um InsumoStore é ordenado pelas colunas com np.lexsort (estável) e volta como store novo
+    """
+    medicao = _MEDICAO.get()
+    if medicao is not None:
+        return _medir_ordenacao(medicao, lista, criterios, decrescente, algoritmo, no_lugar)
+    return _ordenar(lista, criterios, decrescente, algoritmo, no_lugar)
+
+
+def _ordenar(lista, criterios, decrescente, algoritmo, no_lugar):
+    if algoritmo not in ALGORITMOS_ORDENACAO:
+        raise ValueError(f"Algoritmo desconhecido: {algoritmo!r} (use {', '.join(ALGORITMOS_ORDENACAO)})")
+    if isinstance(lista, InsumoStore):
+        return _ordenar_store(lista, criterios, decrescente)
+    
+    if algoritmo == 'timsort':
+        itens = [lista[i] for i in _ordem_timsort(lista, criterios, decrescente)]
+    elif algoritmo == 'merge':
+        _, itens = _merge_sort_iterativo(chaves_ordenacao(lista, criterios, decrescente), list(lista))
+    else:
+        itens = lista if no_lugar else list(lista)
+        _introsort(chaves_ordenacao(itens, criterios, decrescente), itens)
+    
+    if no_lugar and itens is not lista:
+        lista[:] = itens
+        return lista
+    return itens
+
+
+def _ordem_timsort(lista, criterios, decrescente):
+    """
+    Permutação ordenada com list.sort: uma passada estável por critério, do menos
+    para o mais significativo (reverse=True mantém a estabilidade), sem tuplas nem postos
+    """
+    criterios, decrescente = _normalizar_criterios(criterios, decrescente)
+    ordem = list(range(len(lista)))
+    for criterio, invertido in reversed(list(zip(criterios, decrescente))):
+        coluna = _contar_comparacoes(list(map(EXTRATORES_CHAVE[criterio], lista)))
+        ordem.sort(key=coluna.__getitem__, reverse=invertido)
+    return ordem
+
+
+def _ordenar_store(store, criterios, decrescente):
+    """Ordenação estável de um InsumoStore por várias colunas"""
+    np = _importar_numpy()
+    criterios, decrescente = _normalizar_criterios(criterios, decrescente)
+    colunas = []
+    for criterio, invertido in zip(criterios, decrescente):
+        coluna = store.chaves(criterio)
+        if coluna.dtype.kind == 'M':
+            coluna = coluna.view(np.int64)
+        colunas.append(-coluna.astype(np.int64) if invertido else coluna)
+    return store.selecionar(np.lexsort(colunas[::-1]))
+
+
+def _insercao(chaves, itens, inicio, fim):
+    """Inserção estável em chaves[inicio:fim], levando itens junto"""
+    for i in range(inicio + 1, fim):
+        chave = chaves[i]
+        if not chave < chaves[i - 1]:
+            continue
+        item = itens[i]
+        j = i
+        while j > inicio and chave < chaves[j - 1]:
+            chaves[j] = chaves[j - 1]
+            itens[j] = itens[j - 1]
+            j -= 1
+        chaves[j] = chave
+        itens[j] = item
+
+
+def _merge_sort_iterativo(chaves, itens):
+    """
+    Merge sort bottom-up e estável: corridas de TAMANHO_CORRIDA por inserção,
+    depois intercalações de largura dobrando entre dois buffers (sem recursão nem fatias)
+    Recebe listas que pode alterar e retorna (chaves, itens) ordenados
+    """
+    n = len(chaves)
+    for inicio in range(0, n, TAMANHO_CORRIDA):
+        _insercao(chaves, itens, inicio, min(inicio + TAMANHO_CORRIDA, n))
+    
+    origem_c, origem_i = chaves, itens
+    destino_c, destino_i = [None] * n, [None] * n
+    largura = TAMANHO_CORRIDA
+    while largura < n:
+        for esquerda in range(0, n, 2 * largura):
+            meio = min(esquerda + largura, n)
+            fim = min(esquerda + 2 * largura, n)
+            if meio == fim or not origem_c[meio] < origem_c[meio - 1]:
+                destino_c[esquerda:fim] = origem_c[esquerda:fim]
+                destino_i[esquerda:fim] = origem_i[esquerda:fim]
+                continue
+            i, j, k = esquerda, meio, esquerda
+            while i < meio and j < fim:
+                if origem_c[j] < origem_c[i]:
+                    destino_c[k] = origem_c[j]
+                    destino_i[k] = origem_i[j]
+                    j += 1
+                else:
+                    destino_c[k] = origem_c[i]
+                    destino_i[k] = origem_i[i]
+                    i += 1
+                k += 1
+            if i < meio:
+                destino_c[k:fim] = origem_c[i:meio]
+                destino_i[k:fim] = origem_i[i:meio]
+            else:
+                destino_c[k:fim] = origem_c[j:fim]
+                destino_i[k:fim] = origem_i[j:fim]
+        origem_c, destino_c = destino_c, origem_c
+        origem_i, destino_i = destino_i, origem_i
+        largura *= 2
+    return origem_c, origem_i
+
+
+def _introsort(chaves, itens):
+    """Introsort no lugar sobre listas paralelas (chaves, itens)"""
+    n = len(chaves)
+    limite = 2 * max(n, 1).bit_length()
+    medicao = _MEDICAO.get()
+    minimo = None if medicao is None or medicao.algoritmo is None else [limite]
+    _introsort_faixa(chaves, itens, 0, n, limite, minimo)
+    if minimo is not None:
+        medicao.registro.maximo('ordenacao_profundidade_maxima', limite - minimo[0], algoritmo=medicao.algoritmo)
+
+
+def _introsort_faixa(chaves, itens, inicio, fim, profundidade, minimo=None):
+    """minimo: [menor profundidade restante vista], só preenchido sob instrumentar()"""
+    while fim - inicio > 16:
+        if profundidade == 0:
+            _heapsort_faixa(chaves, itens, inicio, fim)
+            return
+        profundidade -= 1
+        if minimo is not None and profundidade < minimo[0]:
+            minimo[0] = profundidade
+        corte = _particionar(chaves, itens, inicio, fim)
+        if corte - inicio < fim - corte:
+            _introsort_faixa(chaves, itens, inicio, corte, profundidade, minimo)
+            inicio = corte
+        else:
+            _introsort_faixa(chaves, itens, corte, fim, profundidade, minimo)
+            fim = corte
+    _insercao(chaves, itens, inicio, fim)
+
+
+def _particionar(chaves, itens, inicio, fim):
+    """Partição de Hoare em uma passada com pivô mediana de três; retorna o corte"""
+    a, b, c = chaves[inicio], chaves[(inicio + fim - 1) // 2], chaves[fim - 1]
+    if a < b:
+        pivo = b if b < c else (c if a < c else a)
+    else:
+        pivo = a if a < c else (c if b < c else b)
+    
+    i, j = inicio - 1, fim
+    while True:
+        i += 1
+        while chaves[i] < pivo:
+            i += 1
+        j -= 1
+        while pivo < chaves[j]:
+            j -= 1
+        if i >= j:
+            return j + 1
+        chaves[i], chaves[j] = chaves[j], chaves[i]
+        itens[i], itens[j] = itens[j], itens[i]
+
+
+def _heapsort_faixa(chaves, itens, inicio, fim):
+    """Heapsort de chaves[inicio:fim] (garante O(n log n) quando o quicksort degenera)"""
+    n = fim - inicio
+    for raiz in range(n // 2 - 1, -1, -1):
+        _peneirar(chaves, itens, inicio, raiz, n)
+    for ultimo in range(n - 1, 0, -1):
+        chaves[inicio], chaves[inicio + ultimo] = chaves[inicio + ultimo], chaves[inicio]
+        itens[inicio], itens[inicio + ultimo] = itens[inicio + ultimo], itens[inicio]
+        _peneirar(chaves, itens, inicio, 0, ultimo)
+
+
+def _peneirar(chaves, itens, inicio, raiz, n):
+    while True:
+        filho = 2 * raiz + 1
+        if filho >= n:
+            return
+        if filho + 1 < n and chaves[inicio + filho] < chaves[inicio + filho + 1]:
+            filho += 1
+        if not chaves[inicio + raiz] < chaves[inicio + filho]:
+            return
+        a, b = inicio + raiz, inicio + filho
+        chaves[a], chaves[b] = chaves[b], chaves[a]
+        itens[a], itens[b] = itens[b], itens[a]
+        raiz = filho
+
+
+def medir_ordenacao(num_registros=100_000, criterios=('nome', 'validade'), decrescente=(False, True),
+                    repeticoes=3, semente=0):
+    """
+    Mede cada algoritmo de ordenar() contra sorted() (uma passada estável por critério,
+    do menos para o mais significativo, com reverse=True nos decrescentes)
+    Retorna {algoritmo: melhor tempo em segundos}; os estáveis são conferidos contra sorted()
+    """
+    dados = gerar_dados_simulados(num_registros, semente=semente)
+    criterios, decrescente = _normalizar_criterios(criterios, decrescente)
+    
+    def por_sorted():
+        resultado = dados
+        for criterio, invertido in reversed(list(zip(criterios, decrescente))):
+            resultado = sorted(resultado, key=EXTRATORES_CHAVE[criterio], reverse=invertido)
+        return resultado
+    
+    tempos = {}
+    
+    def cronometrar(nome, funcao):
+        melhor = None
+        for _ in range(repeticoes):
+            inicio = perf_counter()
+            resultado = funcao()
+            decorrido = perf_counter() - inicio
+            melhor = decorrido if melhor is None else min(melhor, decorrido)
+        tempos[nome] = melhor
+        return resultado
+    
+    referencia = cronometrar('sorted', por_sorted)
+    for algoritmo in ALGORITMOS_ORDENACAO:
+        resultado = cronometrar(algoritmo, lambda: ordenar(dados, criterios, decrescente, algoritmo))
+        if algoritmo == 'intro':
+            if chaves_ordenacao(resultado, criterios, decrescente) != chaves_ordenacao(referencia, criterios, decrescente):
+                raise AssertionError("intro não ordenou as chaves")
+        elif resultado != referencia:
+            raise AssertionError(f"{algoritmo} divergiu de sorted()")
+    return tempos
+
+
+class _Invertido:
+    """Envolve um valor invertendo a comparação (critério decrescente sem conhecer todos os valores)"""
+    __slots__ = ('valor',)
+    
+    def __init__(self, valor):
+        self.valor = valor
+    
+    def __lt__(self, outro):
+        return outro.valor < self.valor
+    
+    def __eq__(self, outro):
+        return self.valor == outro.valor
+
+
+def _gravar_corrida(diretorio, registros, por_bloco):
+    """Grava uma corrida ordenada em blocos de `por_bloco` tuplas (nome, quantidade, data, validade) com pickle"""
+    registros = iter(registros)
+    arquivo = tempfile.NamedTemporaryFile(dir=diretorio, suffix='.corrida', delete=False)
+    with arquivo:
+        while True:
+            bloco = [(r.nome, r.quantidade, r.data, r.validade) for r in islice(registros, por_bloco)]
+            if not bloco:
+                break
+            pickle.dump(bloco, arquivo, protocol=pickle.HIGHEST_PROTOCOL)
+    return arquivo.name
+
+
+def _ler_corrida(caminho):
+    """Relê uma corrida bloco a bloco, com um bloco gravado por vez em memória"""
+    with open(caminho, 'rb') as arquivo:
+        while True:
+            try:
+                bloco = pickle.load(arquivo)
+            except EOFError:
+                return
+            for nome, quantidade, data, validade in bloco:
+                yield Insumo.com_validade(nome, quantidade, data, validade)
+
+
+def ordenar_externo(registros, criterios='nome', decrescente=False, max_registros_memoria=100_000,
+                    max_arquivos=64, diretorio=None):
+    """
+    Merge sort externo: ordena fluxos de insumos maiores que a memória
+    
+    Lê `registros` (qualquer iterável) em pedaços de max_registros_memoria, ordena cada um
+    com ordenar() e grava como corrida num diretório temporário; depois intercala as
+    corridas com heapq.merge (o merge() de k vias), no máximo max_arquivos abertos por vez.
+    Gera os insumos em ordem; estável, com os mesmos critérios e direções de ordenar().
+    Se tudo couber em um pedaço, nada é gravado em disco.
+    
+    Os blocos das corridas têm max_registros_memoria // max_arquivos registros, de modo que
+    as corridas abertas numa intercalação somam no máximo max_registros_memoria em memória.
+    """
+    criterios, decrescente = _normalizar_criterios(criterios, decrescente)
+    if max_registros_memoria < 1 or max_arquivos < 2:
+        raise ValueError("max_registros_memoria deve ser >= 1 e max_arquivos >= 2")
+    
+    extratores = [EXTRATORES_CHAVE[criterio] for criterio in criterios]
+    inverter = len(set(decrescente)) > 1
+    if inverter:
+        extratores = [(lambda f: lambda insumo: _Invertido(f(insumo)))(f) if invertido else f
+                      for f, invertido in zip(extratores, decrescente)]
+    if len(extratores) == 1:
+        chave = extratores[0]
+    else:
+        chave = lambda insumo: tuple(f(insumo) for f in extratores)
+    reverso = decrescente[0] and not inverter
+    
+    entrada = iter(registros)
+    pedaco = list(islice(entrada, max_registros_memoria))
+    seguinte = next(entrada, None)
+    if seguinte is None:
+        yield from ordenar(pedaco, criterios, decrescente)
+        return
+    
+    por_bloco = max(1, max_registros_memoria // max_arquivos)
+    with tempfile.TemporaryDirectory(prefix='ordenacao_', dir=diretorio) as temporario:
+        corridas = []
+        while True:
+            pedaco = ordenar(pedaco, criterios, decrescente, no_lugar=True)
+            corridas.append(_gravar_corrida(temporario, pedaco, por_bloco))
+            if seguinte is None:
+                break
+            pedaco.clear()
+            pedaco.append(seguinte)
+            pedaco.extend(islice(entrada, max_registros_memoria - 1))
+            seguinte = next(entrada, None)
+        del pedaco
+        
+        while len(corridas) > max_arquivos:
+            intercaladas = []
+            for inicio in range(0, len(corridas), max_arquivos):
+                grupo = corridas[inicio:inicio + max_arquivos]
+                fluxo = heapq.merge(*map(_ler_corrida, grupo), key=chave, reverse=reverso)
+                intercaladas.append(_gravar_corrida(temporario, fluxo, por_bloco))
+                for caminho in grupo:
+                    os.remove(caminho)
+            corridas = intercaladas
+        
+        yield from heapq.merge(*map(_ler_corrida, corridas), key=chave, reverse=reverso)
+
+
+LIMITE_ORDENACAO_SERIAL = 200_000
+
+
+def _coluna_int64(registros, criterio):
+    """Coluna int64 que ordena como o critério (nomes viram postos, datas microssegundos)"""
+    np = _importar_numpy()
+    if isinstance(registros, InsumoStore):
+        coluna = registros.chaves(criterio)
+    elif criterio == 'nome':
+        minusculos = [insumo.nome.lower() for insumo in registros]
+        posto = {nome: i for i, nome in enumerate(sorted(set(minusculos)))}
+        return np.fromiter((posto[nome] for nome in minusculos), dtype=np.int64, count=len(minusculos))
+    elif criterio == 'quantidade':
+        return np.fromiter((insumo.quantidade for insumo in registros), dtype=np.int64, count=len(registros))
+    else:
+        coluna = np.array([insumo.validade for insumo in registros], dtype='datetime64[us]')
+    if coluna.dtype.kind == 'M':
+        coluna = coluna.astype('datetime64[us]').view(np.int64)
+    return coluna.astype(np.int64, copy=False)
+
+
+def chave_int64(registros, criterios='nome', decrescente=False):
+    """
+    Uma única chave int64 por registro, na ordem de ordenar(registros, criterios, decrescente)
+    Cada coluna é deslocada para começar em 0 e as colunas são empacotadas em bits (a primeira
+    é a mais significativa); se não couberem em 63 bits, usa postos densos (np.unique)
+    Retorna None quando nem assim cabem
+    """
+    np = _importar_numpy()
+    criterios, decrescente = _normalizar_criterios(criterios, decrescente)
+    colunas = []
+    for criterio, invertido in zip(criterios, decrescente):
+        coluna = _coluna_int64(registros, criterio)
+        colunas.append(-coluna if invertido else coluna)
+    if not len(colunas[0]):
+        return np.zeros(0, dtype=np.int64)
+    
+    for densos in (False, True):
+        if densos:
+            colunas = [np.unique(coluna, return_inverse=True)[1].astype(np.int64) for coluna in colunas]
+        colunas = [coluna - coluna.min() for coluna in colunas]
+        larguras = [int(coluna.max()).bit_length() for coluna in colunas]
+        if sum(larguras) <= 63:
+            chave = np.zeros(len(colunas[0]), dtype=np.int64)
+            for coluna, largura in zip(colunas, larguras):
+                chave <<= largura
+                chave |= coluna
+            return chave
+    return None
+
+
+def _ordenar_particao(chaves):
+    """Executado em cada processo: argsort estável de uma partição de chaves int64"""
+    ordem = chaves.argsort(kind='stable')
+    return chaves[ordem], ordem
+
+
+def _intercalar_ordenadas(a, ordem_a, b, ordem_b):
+    """
+    Intercala duas partições ordenadas com searchsorted (sem laço em Python)
+    Nos empates, os elementos de `a` vêm antes: a intercalação é estável
+    """
+    np = _importar_numpy()
+    destino_a = np.searchsorted(b, a, side='left') + np.arange(len(a))
+    destino_b = np.searchsorted(a, b, side='right') + np.arange(len(b))
+    chaves = np.empty(len(a) + len(b), dtype=a.dtype)
+    ordem = np.empty(len(a) + len(b), dtype=ordem_a.dtype)
+    chaves[destino_a] = a
+    chaves[destino_b] = b
+    ordem[destino_a] = ordem_a
+    ordem[destino_b] = ordem_b
+    return chaves, ordem
+
+
+def ordenar_paralelo(registros, criterios='validade', decrescente=False, max_workers=None,
+                     limite_serial=LIMITE_ORDENACAO_SERIAL):
+    """
+    Ordenação paralela para grandes volumes em memória (lista de Insumo ou InsumoStore)
+    
+    Reduz os critérios a uma chave int64 por registro (chave_int64), divide em uma partição
+    por processo, ordena cada partição num ProcessPoolExecutor (só os arrays int64 trafegam,
+    não objetos Insumo) e intercala as partições duas a duas com searchsorted.
+    Estável, com os mesmos critérios e direções de ordenar().
+    Abaixo de limite_serial registros, com max_workers=1 ou sem NumPy, ordena no próprio processo.
+    """
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    if len(registros) < limite_serial or max_workers == 1:
+        return ordenar(registros, criterios, decrescente)
+    try:
+        chaves = chave_int64(registros, criterios, decrescente)
+    except ImportError:
+        return ordenar(registros, criterios, decrescente)
+    if chaves is None:
+        return ordenar(registros, criterios, decrescente)
+    
+    np = _importar_numpy()
+    limites = np.linspace(0, len(chaves), max_workers + 1).astype(np.int64)
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        particoes = list(executor.map(_ordenar_particao, [chaves[i:j] for i, j in zip(limites, limites[1:])]))
+    corridas = [(parcial, ordem + inicio) for (parcial, ordem), inicio in zip(particoes, limites)]
+    
+    while len(corridas) > 1:
+        pares = [_intercalar_ordenadas(*corridas[i], *corridas[i + 1]) for i in range(0, len(corridas) - 1, 2)]
+        if len(corridas) % 2:
+            pares.append(corridas[-1])
+        corridas = pares
+    ordem = corridas[0][1]
+    
+    if isinstance(registros, InsumoStore):
+        return registros.selecionar(ordem)
+    return [registros[i] for i in ordem.tolist()]
+
+
+class AgregadorConsumo:
+    """
+    Consumo diário por insumo agregado dos registros (vetorizado, incremental)
+    
+    Cada nome normalizado (normalizar_nome) vira um código inteiro e cada data um dia
+    contado a partir do primeiro; os totais ficam numa matriz densa insumos × dias,
+    somados com np.bincount sobre o índice linear (ou np.add.at quando o lote é esparso).
+    adicionar() aceita novos lotes a qualquer momento: a matriz cresce nos dois eixos,
+    inclusive para dias anteriores ao início.
+    
+    serie(nome) é o consumo_diario de ProgramacaoDinamica (um valor por dia, zero nos dias
+    sem consumo); series() é o dicionário de consumos de planejar_lote.
+    """
+    
+    def __init__(self, registros=()):
+        np = _importar_numpy()
+        self.nomes = []
+        self._codigos = {}
+        self._inicio = self._base = None
+        self._dias = 0
+        self._totais = np.zeros((0, 0), dtype=np.int64)
+        self.adicionar(registros)
+    
+    @property
+    def inicio(self):
+        """Data do primeiro dia da série (None sem registros)"""
+        return None if self._inicio is None else date.fromordinal(self._inicio)
+    
+    @property
+    def dias(self):
+        return self._dias
+    
+    @property
+    def matriz(self):
+        """Totais insumos × dias (linhas na ordem de self.nomes)"""
+        coluna = self._inicio - self._base if self._dias else 0
+        return self._totais[:len(self.nomes), coluna:coluna + self._dias]
+    
+    def codigo(self, nome):
+        """Código interno do insumo, criado se ainda não existir (nomes guardam a primeira grafia vista)"""
+        chave = normalizar_nome(nome)
+        if chave not in self._codigos:
+            self._codigos[chave] = len(self.nomes)
+            self.nomes.append(nome)
+        return self._codigos[chave]
+    
+    def _colunas(self, registros):
+        """(códigos, dias em ordinal, quantidades) de uma lista de Insumo ou de um InsumoStore"""
+        np = _importar_numpy()
+        if isinstance(registros, InsumoStore):
+            traducao = np.zeros(len(registros.nomes), dtype=np.int64)
+            for codigo in np.unique(registros.codigos).tolist():
+                traducao[codigo] = self.codigo(registros.nomes[codigo])
+            dias = registros.datas.astype('datetime64[D]').astype(np.int64) + date(1970, 1, 1).toordinal()
+            return traducao[registros.codigos], dias, registros.quantidades.astype(np.int64)
+        registros = list(registros)
+        codigos = np.fromiter((self.codigo(r.nome) for r in registros), dtype=np.int64, count=len(registros))
+        dias = np.fromiter((r.data.toordinal() for r in registros), dtype=np.int64, count=len(registros))
+        quantidades = np.fromiter((r.quantidade for r in registros), dtype=np.int64, count=len(registros))
+        return codigos, dias, quantidades
+    
+    def _reservar(self, primeiro, ultimo):
+        """
+        Garante espaço para todos os nomes e para os dias [primeiro, ultimo] (ordinais)
+        A capacidade dobra no eixo que faltar; ao crescer para o passado, metade da folga fica à esquerda
+        """
+        np = _importar_numpy()
+        if self._inicio is None:
+            self._inicio = self._base = primeiro
+        inicio = min(self._inicio, primeiro)
+        fim = max(self._inicio + self._dias - 1, ultimo)
+        linhas, colunas = self._totais.shape
+        cabem_dias = self._base <= inicio and fim < self._base + colunas
+        
+        if not cabem_dias or len(self.nomes) > linhas:
+            novas_linhas = linhas if len(self.nomes) <= linhas else max(len(self.nomes), 2 * linhas, 16)
+            novas_colunas = colunas if cabem_dias else max(fim - inicio + 1, 2 * colunas, 32)
+            base = self._base
+            if not cabem_dias:
+                base = inicio
+                if inicio < self._base:
+                    base -= (novas_colunas - (fim - inicio + 1)) // 2
+            novo = np.zeros((novas_linhas, novas_colunas), dtype=np.int64)
+            origem, destino = self._inicio - self._base, self._inicio - base
+            novo[:linhas, destino:destino + self._dias] = self._totais[:, origem:origem + self._dias]
+            self._totais, self._base = novo, base
+        self._inicio, self._dias = inicio, fim - inicio + 1
+    
+    def adicionar(self, registros):
+        """Soma um lote de registros (lista de Insumo ou InsumoStore) e retorna quantos foram somados"""
+        np = _importar_numpy()
+        codigos, dias, quantidades = self._colunas(registros)
+        if len(codigos) == 0:
+            return 0
+        primeiro, ultimo = int(dias.min()), int(dias.max())
+        self._reservar(primeiro, ultimo)
+        
+        largura = ultimo - primeiro + 1
+        celulas = len(self.nomes) * largura
+        if celulas <= 4 * len(codigos):
+            bloco = np.bincount(codigos * largura + (dias - primeiro), weights=quantidades, minlength=celulas)
+            coluna = primeiro - self._base
+            self._totais[:len(self.nomes), coluna:coluna + largura] += bloco.reshape(-1, largura).astype(np.int64)
+        else:
+            np.add.at(self._totais, (codigos, dias - self._base), quantidades)
+        return len(codigos)
+    
+    def serie(self, nome, inicio=None, fim=None):
+        """Consumo diário do insumo (lista de int) entre as datas inicio e fim, inclusive"""
+        chave = normalizar_nome(nome)
+        if chave not in self._codigos:
+            raise KeyError(f"Insumo sem registros: {nome!r}")
+        primeira = 0 if inicio is None else max(0, inicio.toordinal() - self._inicio)
+        ultima = self._dias if fim is None else max(0, fim.toordinal() - self._inicio + 1)
+        return self.matriz[self._codigos[chave], primeira:ultima].tolist()
+    
+    def series(self, inicio=None, fim=None):
+        """{nome: consumo_diario} de todos os insumos, no formato de planejar_lote"""
+        return {nome: self.serie(nome, inicio, fim) for nome in self.nomes}
+    
+    def totais(self):
+        """{nome: consumo total} de todos os insumos"""
+        return dict(zip(self.nomes, self.matriz.sum(axis=1).tolist()))
+    
+    def programacao(self, nome, inicio=None, fim=None, solver=None, **parametros):
+        """Solver (ProgramacaoDinamica por padrão) montado sobre a série do insumo"""
+        return (solver or ProgramacaoDinamica)(self.serie(nome, inicio, fim), **parametros)
+    
+    def __len__(self):
+        return len(self.nomes)
+
+
+def tipo_indice(quantidade):
+    """Menor typecode de array (também aceito como dtype do NumPy) que indexa `quantidade` opções"""
+    if quantidade <= 1 << 8:
+        return 'B'
+    if quantidade <= 1 << 16:
+        return 'H'
+    return 'I'
+
+
+def array_zerado(tipo, tamanho):
+    """array do módulo array com `tamanho` zeros, alocado de uma vez"""
+    return array(tipo, bytes(array(tipo).itemsize * tamanho))
+
+
+def _medido_pd(rotulo, memo=False, transicoes=True):
     """
-    Quick Sort - Divide e conquista com pivô
-    Critérios: 'nome', 'quantidade', 'validade'
+    Gancho fixo de instrumentação dos solvers de PD: fora de instrumentar() só consulta o
+    contexto e chama o método; dentro, mede com _medir_memo (memo=True) ou _medir_tabela
     """
-    if len(lista) <= 1:
-        return lista
-    
-    pivo = lista[len(lista) // 2]
-    menores = [x for x in lista if comparar(x, pivo, criterio) and x != pivo]
-    iguais = [x for x in lista if not comparar(x, pivo, criterio) and not comparar(pivo, x, criterio)]
-    maiores = [x for x in lista if comparar(pivo, x, criterio) and x != pivo]
-    
-    return quick_sort(menores, criterio) + iguais + quick_sort(maiores, criterio)
+    def decorador(metodo):
+        @wraps(metodo)
+        def solver(self, *args, **kwargs):
+            medicao = _MEDICAO.get()
+            if medicao is None:
+                return metodo(self, *args, **kwargs)
+            if memo:
+                return _medir_memo(medicao, rotulo, metodo, self, *args, **kwargs)
+            return _medir_tabela(medicao, rotulo, transicoes, metodo, self, *args, **kwargs)
+        return solver
+    return decorador
 
 
-def comparar(insumo1, insumo2, criterio):
-    """Função auxiliar para comparar insumos por diferentes critérios"""
-    if criterio == 'nome':
-        return insumo1.nome.lower() < insumo2.nome.lower()
-    elif criterio == 'quantidade':
-        return insumo1.quantidade < insumo2.quantidade
-    elif criterio == 'validade':
-        return insumo1.validade < insumo2.validade
-    return False
+class TabelaPD:
+    """
+    Armazenamento compacto da Programação Dinâmica
+    
+    Custos: apenas duas linhas array('d') (dia atual e dia seguinte), trocadas a cada dia
+    Decisões: ponteiros (índice do pedido escolhido) em um array de inteiros pequenos
+    """
+    
+    def __init__(self, dias, estados, num_pedidos):
+        self.estados = estados
+        self.atual = array_zerado('d', estados)
+        self.futuro = array_zerado('d', estados)
+        self.ponteiros = array_zerado(tipo_indice(num_pedidos), dias * estados)
+    
+    def indice(self, dia, estoque):
+        return self.ponteiros[dia * self.estados + estoque]
+    
+    def avancar(self):
+        """Terminado um dia, a linha atual vira a 'futura' do dia anterior"""
+        self.atual, self.futuro = self.futuro, self.atual
 
 
 class ProgramacaoDinamica:
@@ -186,15 +2104,26 @@ class ProgramacaoDinamica:
     Decisão: quantidade a pedir em cada dia
     Transição: estoque[i+1] = estoque[i] - consumo[i] + pedido[i]
     Objetivo: minimizar custo total (pedidos + armazenamento + falta)
+    
+    capacidade_max: teto do estoque (padrão: 3 × maior consumo diário)
+    passo_pedido: granularidade dos pedidos (padrão: múltiplos de 10)
     """
     
-    def __init__(self, consumo_diario, custo_pedido=100, custo_armazenamento=1, custo_falta=50):
+    def __init__(self, consumo_diario, custo_pedido=100, custo_armazenamento=1, custo_falta=50,
+                 capacidade_max=None, passo_pedido=10):
         self.consumo = consumo_diario
         self.dias = len(consumo_diario)
         self.custo_pedido = custo_pedido
         self.custo_armazenamento = custo_armazenamento
         self.custo_falta = custo_falta
-        self.capacidade_max = max(consumo_diario) * 3
+        self.capacidade_max = max(consumo_diario) * 3 if capacidade_max is None else capacidade_max
+        if passo_pedido < 1:
+            raise ValueError("passo_pedido deve ser positivo")
+        self.passo_pedido = passo_pedido
+    
+    def pedidos_possiveis(self):
+        """Pedidos considerados em cada dia: 0, passo, 2 × passo, ... até a capacidade"""
+        return range(0, self.capacidade_max + 1, self.passo_pedido)
     
     def calcular_custo(self, estoque, consumo, pedido):
         """Calcula custo total de uma decisão"""
@@ -214,79 +2143,1229 @@ class ProgramacaoDinamica:
         
         return custo, estoque_final
     
+    @_medido_pd('recursivo', memo=True)
     def recursivo(self, dia=0, estoque=0, memo=None):
-        """Versão recursiva com memorização"""
+        """
+        Versão recursiva com memorização
+        O memo guarda só (custo, pedido) por estado; as decisões são refeitas
+        seguindo os pedidos memorizados a partir de (dia, estoque)
+        """
         if memo is None:
             memo = {}
         
+        custo = self._recursivo_custo(dia, estoque, memo)
+        return custo, self._reconstruir(lambda d, e: memo[(d, e)][1], dia, estoque)
+    
+    def _recursivo_custo(self, dia, estoque, memo):
+        """Recursão propriamente dita: devolve só o custo ótimo a partir de (dia, estoque)"""
         if dia >= self.dias:
-            return 0, []
+            return 0
         
         if (dia, estoque) in memo:
-            return memo[(dia, estoque)]
+            return memo[(dia, estoque)][0]
         
         melhor_custo = float('inf')
-        melhor_decisao = []
+        melhor_pedido = 0
         
         consumo_hoje = self.consumo[dia]
-        for pedido in range(0, self.capacidade_max + 1, 10):
+        for pedido in self.pedidos_possiveis():
             custo_hoje, novo_estoque = self.calcular_custo(estoque, consumo_hoje, pedido)
             
             if novo_estoque > self.capacidade_max:
                 continue
             
-            custo_futuro, decisoes_futuras = self.recursivo(dia + 1, novo_estoque, memo)
+            custo_futuro = self._recursivo_custo(dia + 1, novo_estoque, memo)
             custo_total = custo_hoje + custo_futuro
             
             if custo_total < melhor_custo:
                 melhor_custo = custo_total
-                melhor_decisao = [pedido] + decisoes_futuras
+                melhor_pedido = pedido
         
-        memo[(dia, estoque)] = (melhor_custo, melhor_decisao)
-        return melhor_custo, melhor_decisao
-    
-    def iterativo(self, estoque_inicial=0):
-        """Versão iterativa (bottom-up)"""
-        dp = [[None for _ in range(self.capacidade_max + 1)] for _ in range(self.dias + 1)]
+        memo[(dia, estoque)] = (melhor_custo, melhor_pedido)
+        return melhor_custo
+    
+    @_medido_pd('recursivo_pilha', memo=True)
+    def recursivo_pilha(self, dia=0, estoque=0, memo=None):
+        """
+        Mesma memorização de recursivo(), com a recursão trocada por uma pilha explícita.
+        Cada quadro guarda (dia, estoque, próximo pedido, melhor custo, melhor pedido);
+        quando falta o custo de um filho, o quadro é suspenso e o filho empilhado.
+        A pilha nunca passa de `dias` quadros, então horizontes de anos não
+        esbarram no limite de recursão do Python.
+        """
+        if memo is None:
+            memo = {}
+        
+        if dia < self.dias and (dia, estoque) not in memo:
+            pedidos = self.pedidos_possiveis()
+            pilha = [[dia, estoque, 0, float('inf'), 0]]
+            
+            while pilha:
+                quadro = pilha[-1]
+                d, e, k, melhor_custo, melhor_pedido = quadro
+                consumo_hoje = self.consumo[d]
+                suspenso = False
+                
+                while k < len(pedidos):
+                    pedido = pedidos[k]
+                    custo_hoje, novo_estoque = self.calcular_custo(e, consumo_hoje, pedido)
+                    
+                    if novo_estoque <= self.capacidade_max:
+                        if d + 1 >= self.dias:
+                            custo_futuro = 0
+                        elif (d + 1, novo_estoque) in memo:
+                            custo_futuro = memo[(d + 1, novo_estoque)][0]
+                        else:
+                            quadro[2:] = [k, melhor_custo, melhor_pedido]
+                            pilha.append([d + 1, novo_estoque, 0, float('inf'), 0])
+                            suspenso = True
+                            break
+                        
+                        custo_total = custo_hoje + custo_futuro
+                        if custo_total < melhor_custo:
+                            melhor_custo = custo_total
+                            melhor_pedido = pedido
+                    k += 1
+                
+                if not suspenso:
+                    memo[(d, e)] = (melhor_custo, melhor_pedido)
+                    pilha.pop()
         
-        for estoque in range(self.capacidade_max + 1):
-            dp[self.dias][estoque] = (0, 0)
+        custo = memo[(dia, estoque)][0] if dia < self.dias else 0
+        return custo, self._reconstruir(lambda d, e: memo[(d, e)][1], dia, estoque)
+    
+    @_medido_pd('iterativo')
+    def iterativo(self, estoque_inicial=0, engine="python"):
+        """
+        Versão iterativa (bottom-up)
+        engine: 'python' (laços puros) ou 'numpy' (linha de custos vetorizada por dia)
+        """
+        if engine == "numpy":
+            return self._iterativo_numpy(estoque_inicial)
+        if engine != "python":
+            raise ValueError(f"Engine desconhecida: {engine!r} (use 'python' ou 'numpy')")
+        
+        pedidos = self.pedidos_possiveis()
+        tabela = TabelaPD(self.dias, self.capacidade_max + 1, len(pedidos))
         
         for dia in range(self.dias - 1, -1, -1):
             consumo_hoje = self.consumo[dia]
+            futuro, atual = tabela.futuro, tabela.atual
+            ponteiros, base = tabela.ponteiros, dia * tabela.estados
             for estoque in range(self.capacidade_max + 1):
                 melhor_custo = float('inf')
                 melhor_pedido = 0
                 
-                for pedido in range(0, self.capacidade_max + 1, 10):
+                for pedido in pedidos:
                     custo_hoje, novo_estoque = self.calcular_custo(estoque, consumo_hoje, pedido)
                     
                     if novo_estoque > self.capacidade_max:
                         continue
                     
-                    custo_futuro = dp[dia + 1][novo_estoque][0]
+                    custo_futuro = futuro[novo_estoque]
                     custo_total = custo_hoje + custo_futuro
                     
                     if custo_total < melhor_custo:
                         melhor_custo = custo_total
                         melhor_pedido = pedido
                 
-                dp[dia][estoque] = (melhor_custo, melhor_pedido)
+                atual[estoque] = melhor_custo
+                ponteiros[base + estoque] = melhor_pedido // pedidos.step
+            tabela.avancar()
+        
+        decisoes = self._reconstruir(lambda d, e: pedidos[tabela.indice(d, e)], 0, estoque_inicial)
+        custo_total = self._custo_plano(estoque_inicial, decisoes)
+        return custo_total, decisoes
+    
+    def _iterativo_numpy(self, estoque_inicial):
+        """
+        Mesma recorrência de iterativo(), calculando de uma vez o custo de todos
+        os pares (estoque, pedido) do dia com broadcasting e reduzindo com argmin.
+        O argmin devolve o primeiro mínimo, o mesmo desempate do laço em Python.
+        """
+        np = _importar_numpy()
+        
+        estoques = np.arange(self.capacidade_max + 1)
+        pedidos = np.arange(0, self.capacidade_max + 1, self.passo_pedido)
+        custo_fixo = np.where(pedidos > 0, self.custo_pedido, 0)
+        bloco = max(1, LIMITE_ELEMENTOS_NUMPY // len(pedidos))
+        
+        futuro = np.zeros(self.capacidade_max + 1)
+        escolhas = np.zeros((self.dias, self.capacidade_max + 1), dtype=tipo_indice(len(pedidos)))
+        
+        for dia in range(self.dias - 1, -1, -1):
+            atual = np.empty_like(futuro)
+            for inicio in range(0, len(estoques), bloco):
+                faixa = estoques[inicio:inicio + bloco]
+                estoque_final = faixa[:, None] - self.consumo[dia] + pedidos[None, :]
+                
+                custo = (custo_fixo
+                         + np.where(estoque_final > 0, estoque_final * self.custo_armazenamento, 0)
+                         + np.where(estoque_final < 0, -estoque_final * self.custo_falta, 0))
+                novo_estoque = np.maximum(estoque_final, 0)
+                viavel = novo_estoque <= self.capacidade_max
+                
+                total = custo + futuro[np.where(viavel, novo_estoque, 0)]
+                total = np.where(viavel, total, np.inf)
+                
+                melhor = total.argmin(axis=1)
+                escolhas[dia, inicio:inicio + bloco] = melhor
+                atual[inicio:inicio + bloco] = total[np.arange(len(faixa)), melhor]
+            futuro = atual
         
+        decisoes = self._reconstruir(lambda d, e: int(pedidos[escolhas[d, e]]), 0, estoque_inicial)
+        custo_total = self._custo_plano(estoque_inicial, decisoes)
+        return custo_total, decisoes
+    
+    def _reconstruir(self, pedido_em, dia, estoque):
+        """Refaz a lista de decisões seguindo os ponteiros: pedido_em(dia, estoque) -> pedido"""
+        medicao = _MEDICAO.get()
+        inicio = perf_counter()
         decisoes = []
+        for d in range(dia, self.dias):
+            pedido = pedido_em(d, estoque)
+            decisoes.append(pedido)
+            _, estoque = self.calcular_custo(estoque, self.consumo[d], pedido)
+        if medicao is not None:
+            medicao.reconstruir += perf_counter() - inicio
+        return decisoes
+    
+    def grosso_fino(self, estoque_inicial=0, fator=None, banda=None, calcular_gap=False):
+        """
+        Resolve numa grade grossa e refina só uma faixa em torno da trajetória grossa
+        
+        1. Grade grossa: estoque em unidades de `fator` (padrão: ~capacidade / 300, alinhado
+           ao passo do pedido), consumo arredondado e custos unitários multiplicados por `fator`;
+           resolvida com PoliticaSS
+        2. O plano grosso é traduzido para pedidos finos e simulado no consumo real
+           (é um plano viável: custo_grosso é um limite superior)
+        3. PD fina restrita, em cada dia, aos estoques a até `banda` unidades da trajetória
+           (padrão: 2 × fator + passo) e aos pedidos a até 2 × banda do pedido grosso (e ao pedido zero),
+           em blocos de linhas de até LIMITE_ELEMENTOS_NUMPY elementos; se o ótimo encostar na borda
+           de uma faixa, as faixas dobram e o passo 3 se repete
+        
+        Retorna (custo_total, decisoes, relatorio). O relatório traz fator, banda final,
+        custo_grosso, refinamentos e, com calcular_gap=True, o ótimo exato
+        (PoliticaSS na grade fina, O(dias × capacidade)) e o gap relativo.
+        """
+        cap, passo = self.capacidade_max, self.passo_pedido
+        if fator is None:
+            fator = max(1, cap // 300)
+            if fator < passo:
+                fator = max(d for d in range(1, fator + 1) if passo % d == 0)
+            else:
+                fator -= fator % passo
+        if banda is None:
+            banda = 2 * fator + passo
+        
+        grosso = PoliticaSS(
+            [round(consumo / fator) for consumo in self.consumo],
+            self.custo_pedido, self.custo_armazenamento * fator, self.custo_falta * fator,
+            capacidade_max=cap // fator, passo_pedido=max(1, round(passo / fator)),
+        )
+        _, decisoes_grossas = grosso.iterativo(min(round(estoque_inicial / fator), grosso.capacidade_max),
+                                               engine="numpy")
+        
+        trajetoria = [estoque_inicial]
+        pedidos_grossos = []
+        custo_grosso = 0
+        for dia, pedido_grosso in enumerate(decisoes_grossas):
+            estoque = trajetoria[-1]
+            limite = min(cap, cap - estoque + self.consumo[dia])
+            pedido = max(0, min(round(pedido_grosso * fator / passo) * passo, limite // passo * passo))
+            custo_hoje, estoque = self.calcular_custo(estoque, self.consumo[dia], pedido)
+            custo_grosso += custo_hoje
+            trajetoria.append(estoque)
+            pedidos_grossos.append(pedido)
+        
+        refinamentos = 0
+        while True:
+            refinamentos += 1
+            faixas = [(estoque_inicial, estoque_inicial)]
+            faixas += [(max(0, estoque - banda), min(cap, estoque + banda)) for estoque in trajetoria[1:]]
+            custo_total, decisoes, toca_borda = self._resolver_faixas(estoque_inicial, faixas, pedidos_grossos,
+                                                                      2 * banda)
+            if not toca_borda or banda >= cap:
+                break
+            banda *= 2
+        
+        relatorio = {
+            'fator': fator,
+            'banda': banda,
+            'custo_grosso': custo_grosso,
+            'refinamentos': refinamentos,
+            'custo_exato': None,
+            'gap': None,
+        }
+        if calcular_gap:
+            exato, _ = PoliticaSS(self.consumo, self.custo_pedido, self.custo_armazenamento, self.custo_falta,
+                                  capacidade_max=cap, passo_pedido=passo).iterativo(estoque_inicial, engine="numpy")
+            relatorio['custo_exato'] = exato
+            relatorio['gap'] = (custo_total - exato) / exato if exato else 0.0
+        
+        return custo_total, decisoes, relatorio
+    
+    def _resolver_faixas(self, estoque_inicial, faixas, pedidos_guia=None, banda_pedido=None):
+        """
+        PD (NumPy) com o estoque do início de cada dia restrito a faixas[dia] = (mínimo, máximo)
+        e, com pedidos_guia, os pedidos de cada dia restritos a pedidos_guia[dia] ± banda_pedido
+        (mais o pedido zero); as linhas de estoque vão em blocos de até LIMITE_ELEMENTOS_NUMPY elementos
+        Retorna (custo_total, decisoes, se o caminho ótimo encostou na borda de alguma faixa)
+        """
+        np = _importar_numpy()
+        cap, passo = self.capacidade_max, self.passo_pedido
+        
+        futuro = np.zeros(faixas[-1][1] - faixas[-1][0] + 1)
+        escolhas = []
+        bordas_pedido = []
+        for dia in range(self.dias - 1, -1, -1):
+            (lo, hi), (lo_seg, hi_seg) = faixas[dia], faixas[dia + 1]
+            consumo = self.consumo[dia]
+            k_min = 0 if lo_seg == 0 else max(0, -(-(lo_seg - hi + consumo) // passo))
+            k_max = min(cap, hi_seg - lo + consumo) // passo
+            borda_min = borda_max = None
+            if pedidos_guia is not None:
+                guia_min = max(0, -(-(pedidos_guia[dia] - banda_pedido) // passo))
+                guia_max = (pedidos_guia[dia] + banda_pedido) // passo
+                if guia_min > k_min:
+                    k_min = borda_min = guia_min
+                if guia_max < k_max:
+                    k_max = borda_max = guia_max
+            bordas_pedido.append((borda_min and passo * borda_min, borda_max and passo * borda_max))
+            
+            indices = np.arange(k_min, max(k_min, k_max) + 1)
+            if k_min > 0:
+                indices = np.concatenate(([0], indices))
+            pedidos = passo * indices
+            custo_fixo = np.where(pedidos > 0, self.custo_pedido, 0)
+            bloco = max(1, LIMITE_ELEMENTOS_NUMPY // len(pedidos))
+            
+            estoques = np.arange(lo, hi + 1)
+            atual = np.empty(len(estoques))
+            melhores = np.empty(len(estoques), dtype=np.int64)
+            for inicio in range(0, len(estoques), bloco):
+                faixa = estoques[inicio:inicio + bloco]
+                estoque_final = faixa[:, None] - consumo + pedidos[None, :]
+                
+                custo = (custo_fixo
+                         + np.where(estoque_final > 0, estoque_final * self.custo_armazenamento, 0)
+                         + np.where(estoque_final < 0, -estoque_final * self.custo_falta, 0))
+                novo_estoque = np.maximum(estoque_final, 0)
+                viavel = (novo_estoque >= lo_seg) & (novo_estoque <= hi_seg) & (pedidos[None, :] <= cap)
+                
+                total = np.where(viavel, custo + futuro[np.where(viavel, novo_estoque - lo_seg, 0)], np.inf)
+                melhor = total.argmin(axis=1)
+                melhores[inicio:inicio + bloco] = pedidos[melhor]
+                atual[inicio:inicio + bloco] = total[np.arange(len(faixa)), melhor]
+            escolhas.append((lo, melhores))
+            futuro = atual
+        escolhas.reverse()
+        bordas_pedido.reverse()
+        
+        decisoes = self._reconstruir(lambda d, e: int(escolhas[d][1][e - escolhas[d][0]]), 0, estoque_inicial)
+        custo_total = self._custo_plano(estoque_inicial, decisoes)
+        
+        estoque = estoque_inicial
+        toca_borda = False
+        for dia, pedido in enumerate(decisoes):
+            _, estoque = self.calcular_custo(estoque, self.consumo[dia], pedido)
+            lo, hi = faixas[dia + 1]
+            toca_borda |= (estoque == lo and lo > 0) or (estoque == hi and hi < cap)
+            toca_borda |= pedido > 0 and pedido in bordas_pedido[dia]
+        
+        return custo_total, decisoes, toca_borda
+    
+    def _custo_plano(self, estoque_inicial, decisoes):
+        """
+        Custo de um plano somado de trás para frente com os números dos parâmetros
+        (como na tabela original: int com custos int, e int também quando o caminho só usa parcelas int)
+        """
+        custos = []
         estoque = estoque_inicial
-        custo_total = dp[0][estoque][0]
+        for dia, pedido in enumerate(decisoes):
+            custo, estoque = self.calcular_custo(estoque, self.consumo[dia], pedido)
+            custos.append(custo)
+        total = 0
+        for custo in reversed(custos):
+            total = custo + total
+        return total
+
+
+class PoliticaSS(ProgramacaoDinamica):
+    """
+    Solver rápido para o mesmo modelo de ProgramacaoDinamica (mesmo construtor e resultado)
+    
+    Como o custo de pedido é fixo, para y = estoque - consumo + pedido o custo do dia é
+        pedido == 0: h(y) + V(y)            pedido > 0: custo_pedido + h(y) + V(y)
+    e o melhor pedido positivo de cada estoque é o mínimo de uma janela deslizante
+    sobre y, dentro da mesma classe de resto módulo passo_pedido (pedidos são múltiplos dele).
+    Cada dia sai em O(capacidade) em vez de O(capacidade² / passo): para cada estoque
+    decide-se entre não pedir ou pedir até o nível S ótimo da sua classe (política (s, S)).
+    
+    Retorna exatamente o mesmo (custo_total, decisoes) de iterativo(), inclusive desempates.
+    """
+    
+    @_medido_pd('politica_ss', transicoes=False)
+    def iterativo(self, estoque_inicial=0, engine="python"):
+        """Política (s, S) dia a dia, de trás para frente; engine: 'python' ou 'numpy'"""
+        if engine == "numpy":
+            passo_dia = self._dia_numpy
+        elif engine == "python":
+            passo_dia = self._dia_python
+        else:
+            raise ValueError(f"Engine desconhecida: {engine!r} (use 'python' ou 'numpy')")
+        
+        num_pedidos = len(self.pedidos_possiveis())
+        escolhas = []
+        futuro = [0] * (self.capacidade_max + 1)
+        
+        for dia in range(self.dias - 1, -1, -1):
+            futuro, indices = passo_dia(self.consumo[dia], futuro, num_pedidos)
+            escolhas.append(indices)
+        escolhas.reverse()
+        
+        decisoes = self._reconstruir(lambda d, e: self.passo_pedido * int(escolhas[d][e]), 0, estoque_inicial)
+        custo_total = self._custo_plano(estoque_inicial, decisoes)
+        return custo_total, decisoes
+    
+    def _custos_por_nivel(self, consumo, futuro):
+        """Custos h(y) + V(y) (sem pedido) e custo_pedido + h(y) + V(y) para y em [-consumo, capacidade]"""
+        sem_pedido, com_pedido = [], []
+        for y in range(-consumo, self.capacidade_max + 1):
+            if y > 0:
+                h = y * self.custo_armazenamento
+            elif y < 0:
+                h = -y * self.custo_falta
+            else:
+                h = 0
+            v = futuro[max(y, 0)]
+            sem_pedido.append(h + v)
+            com_pedido.append((self.custo_pedido + h) + v)
+        return sem_pedido, com_pedido
+    
+    def _dia_python(self, consumo, futuro, num_pedidos):
+        """Um dia da recorrência com mínimo em janela deslizante (deque monotônica)"""
+        sem_pedido, com_pedido = self._custos_por_nivel(consumo, futuro)
+        janela = num_pedidos - 1
+        estados = self.capacidade_max + 1
+        passo = self.passo_pedido
+        atual = [0] * estados
+        indices = array_zerado(tipo_indice(num_pedidos), estados)
+        
+        for resto in range(min(passo, estados)):
+            serie = com_pedido[resto::passo]
+            candidatos = deque()
+            ultimo = (estados - 1 - resto) // passo
+            for q in range(len(serie) - 1, -1, -1):
+                novo = q + 1
+                if janela and novo < len(serie):
+                    while candidatos and serie[candidatos[-1]] >= serie[novo]:
+                        candidatos.pop()
+                    candidatos.append(novo)
+                while candidatos and candidatos[0] > q + janela:
+                    candidatos.popleft()
+                if q > ultimo:
+                    continue
+                
+                estoque = resto + passo * q
+                melhor_custo, melhor_indice = sem_pedido[estoque], 0
+                if candidatos and serie[candidatos[0]] < melhor_custo:
+                    melhor_custo, melhor_indice = serie[candidatos[0]], candidatos[0] - q
+                atual[estoque] = melhor_custo
+                indices[estoque] = melhor_indice
+        
+        return atual, indices
+    
+    def _dia_numpy(self, consumo, futuro, num_pedidos):
+        """Um dia da recorrência vetorizado, com o mínimo em janela de minimo_em_janela()"""
+        np = _importar_numpy()
+        
+        futuro = np.asarray(futuro, dtype=float)
+        estados = self.capacidade_max + 1
+        y = np.arange(-consumo, estados)
+        h = np.where(y > 0, y * self.custo_armazenamento, np.where(y < 0, -y * self.custo_falta, 0))
+        v = futuro[np.maximum(y, 0)]
+        sem_pedido = (h + v)[:estados]
+        com_pedido = (self.custo_pedido + h) + v
+        
+        melhor_com, deslocamento = minimo_em_janela(com_pedido, self.passo_pedido, num_pedidos - 1, estados)
+        pede = melhor_com < sem_pedido
+        atual = np.where(pede, melhor_com, sem_pedido)
+        indices = np.where(pede, deslocamento, 0).astype(tipo_indice(num_pedidos))
+        return atual, indices
+
+
+def minimo_em_janela(valores, passo, janela, estados):
+    """
+    Para cada posição e < estados, o menor de valores[e + passo·k], k = 1..janela (fora do array: inf),
+    e o primeiro k que o atinge. Algoritmo de van Herk/Gil-Werman: mínimos de prefixo e sufixo
+    por blocos do tamanho da janela, para todas as classes de resto módulo passo de uma vez.
+    """
+    np = _importar_numpy()
+    
+    posicoes = np.arange(estados)
+    if janela == 0:
+        return np.full(estados, np.inf), np.zeros(estados, dtype=np.int64)
+    
+    linhas = -(-max(len(valores), estados) // passo)
+    total_linhas = -(-(linhas + janela + 1) // janela) * janela
+    serie = np.full(total_linhas * passo, np.inf)
+    serie[:len(valores)] = valores
+    serie = serie.reshape(total_linhas, passo)
+    
+    linha = np.arange(total_linhas)[:, None]
+    inicio_bloco = linha % janela == 0
+    fim_bloco = linha % janela == janela - 1
+    
+    blocos = serie.reshape(-1, janela, passo)
+    prefixo = np.minimum.accumulate(blocos, axis=1).reshape(total_linhas, passo)
+    sufixo = np.minimum.accumulate(blocos[:, ::-1], axis=1)[:, ::-1].reshape(total_linhas, passo)
+    
+    anterior = np.vstack([np.full((1, passo), np.inf), prefixo[:-1]])
+    marca = inicio_bloco | (serie < anterior)
+    arg_prefixo = np.maximum.accumulate(np.where(marca, linha, -1), axis=0)
+    
+    marca = fim_bloco | (serie == sufixo)
+    arg_sufixo = np.minimum.accumulate(np.where(marca, linha, total_linhas)[::-1], axis=0)[::-1]
+    
+    q, resto = posicoes // passo, posicoes % passo
+    a, b = q + 1, q + janela
+    usa_sufixo = sufixo[a, resto] <= prefixo[b, resto]
+    minimos = np.where(usa_sufixo, sufixo[a, resto], prefixo[b, resto])
+    argumentos = np.where(usa_sufixo, arg_sufixo[a, resto], arg_prefixo[b, resto])
+    return minimos, argumentos - q
+
+
+def conferir_politica_ss(casos=50, dias_max=8, consumo_max=60, semente=0):
+    """
+    Confere PoliticaSS contra ProgramacaoDinamica.iterativo em casos pequenos aleatórios
+    Retorna a lista de divergências (vazia quando tudo bate)
+    """
+    gerador = random.Random(semente)
+    divergencias = []
+    
+    for _ in range(casos):
+        consumo = [gerador.randint(0, consumo_max) for _ in range(gerador.randint(1, dias_max))]
+        consumo[gerador.randrange(len(consumo))] = gerador.randint(1, consumo_max)
+        parametros = {
+            'custo_pedido': gerador.randint(0, 200),
+            'custo_armazenamento': gerador.randint(0, 5),
+            'custo_falta': gerador.randint(1, 80),
+            'passo_pedido': gerador.choice((1, 5, 10, 15)),
+        }
+        referencia = ProgramacaoDinamica(consumo, **parametros)
+        estoque_inicial = gerador.randint(0, referencia.capacidade_max)
+        
+        esperado = referencia.iterativo(estoque_inicial)
+        obtido = PoliticaSS(consumo, **parametros).iterativo(estoque_inicial)
+        if obtido != esperado:
+            divergencias.append((consumo, parametros, estoque_inicial, esperado, obtido))
+    
+    return divergencias
+
+
+class ProgramacaoDinamicaEstocastica:
+    """
+    Otimização de estoque com demanda incerta: minimiza o custo esperado
+    
+    distribuicoes: um histograma por dia, como {demanda: peso} ou sequência de pesos
+                   indexada pela demanda (os pesos são normalizados)
+    
+    Com y = estoque + pedido (antes do consumo) e D a demanda do dia:
+        W(y) = E[h(y - D) + V(max(0, y - D))]     V(e) = min(W(e), custo_pedido + min W(e + pedido))
+    W é a convolução de h + V com o histograma da demanda (NumPy, ou FFT para suportes longos),
+    e o melhor pedido positivo sai do mesmo mínimo em janela da PoliticaSS.
+    O estoque final não pode passar de capacidade_max em nenhum cenário (y ≤ capacidade + demanda mínima).
+    Uma única solução substitui o laço de Monte Carlo de soluções determinísticas.
+    """
+    
+    LIMITE_CONVOLUCAO_DIRETA = 64
+    
+    def __init__(self, distribuicoes, custo_pedido=100, custo_armazenamento=1, custo_falta=50,
+                 capacidade_max=None, passo_pedido=10):
+        np = _importar_numpy()
+        
+        self.distribuicoes = [self._normalizar(np, distribuicao) for distribuicao in distribuicoes]
+        if not self.distribuicoes:
+            raise ValueError("Informe ao menos um histograma de demanda (um por dia)")
+        self.dias = len(self.distribuicoes)
+        self.custo_pedido = custo_pedido
+        self.custo_armazenamento = custo_armazenamento
+        self.custo_falta = custo_falta
+        maior_demanda = max(len(q) - 1 for q in self.distribuicoes)
+        self.capacidade_max = maior_demanda * 3 if capacidade_max is None else capacidade_max
+        self.passo_pedido = passo_pedido
+        self.politica = None
+        self.custos_esperados = None
+    
+    @staticmethod
+    def _normalizar(np, distribuicao):
+        """Histograma -> vetor de probabilidades indexado pela demanda"""
+        if isinstance(distribuicao, dict):
+            pesos = np.zeros(max(distribuicao) + 1)
+            for demanda, peso in distribuicao.items():
+                pesos[demanda] += peso
+        else:
+            pesos = np.array(distribuicao, dtype=float)
+        
+        if (pesos < 0).any() or pesos.sum() <= 0:
+            raise ValueError("Histograma de demanda precisa de pesos não negativos e soma positiva")
+        return pesos / pesos.sum()
+    
+    def _convolver(self, np, a, b):
+        if min(len(a), len(b)) <= self.LIMITE_CONVOLUCAO_DIRETA:
+            return np.convolve(a, b)
+        tamanho = len(a) + len(b) - 1
+        return np.fft.irfft(np.fft.rfft(a, tamanho) * np.fft.rfft(b, tamanho), tamanho)
+    
+    def iterativo(self, estoque_inicial=0):
+        """
+        Resolve de trás para frente e guarda a política (pedido por dia e estoque)
+        Retorna (custo_esperado, politica), com politica[dia][estoque] = pedido
+        """
+        np = _importar_numpy()
+        
+        estados = self.capacidade_max + 1
+        janela = len(range(0, self.capacidade_max + 1, self.passo_pedido)) - 1
+        futuro = np.zeros(estados)
+        politica = np.zeros((self.dias, estados), dtype=np.int64)
+        custos = np.zeros((self.dias, estados))
+        
+        for dia in range(self.dias - 1, -1, -1):
+            q = self.distribuicoes[dia]
+            demanda_max = len(q) - 1
+            demanda_min = int(np.flatnonzero(q)[0])
+            
+            z = np.arange(-demanda_max, self.capacidade_max + demanda_min + 1)
+            h = np.where(z > 0, z * self.custo_armazenamento, np.where(z < 0, -z * self.custo_falta, 0))
+            g = h + futuro[np.clip(z, 0, self.capacidade_max)]
+            esperado = self._convolver(np, g, q)[demanda_max:demanda_max + self.capacidade_max + demanda_min + 1]
+            
+            melhor_com, deslocamento = minimo_em_janela(self.custo_pedido + esperado, self.passo_pedido,
+                                                        janela, estados)
+            sem_pedido = esperado[:estados]
+            pede = melhor_com < sem_pedido
+            futuro = np.where(pede, melhor_com, sem_pedido)
+            politica[dia] = np.where(pede, deslocamento * self.passo_pedido, 0)
+            custos[dia] = futuro
         
-        for dia in range(self.dias):
-            pedido = dp[dia][estoque][1]
+        self.politica = politica
+        self.custos_esperados = custos
+        return float(futuro[estoque_inicial]), politica
+    
+    def decisao(self, dia, estoque):
+        """
+        Pedido da política ótima para o estoque observado no início do dia
+        Acima de capacidade_max (demanda realizada abaixo da mínima do histograma) não se pede nada:
+        qualquer pedido só afastaria mais o estoque da capacidade
+        """
+        if estoque < 0:
+            raise ValueError(f"Estoque negativo: {estoque}")
+        if self.politica is None:
+            self.iterativo()
+        if estoque > self.capacidade_max:
+            return 0
+        return int(self.politica[dia][estoque])
+    
+    def simular(self, demandas, estoque_inicial=0):
+        """Aplica a política a uma sequência de demandas realizadas: (custo_total, decisoes)"""
+        modelo = ProgramacaoDinamica(list(demandas), self.custo_pedido, self.custo_armazenamento,
+                                     self.custo_falta, self.capacidade_max, self.passo_pedido)
+        custo_total = 0
+        decisoes = []
+        estoque = estoque_inicial
+        for dia, demanda in enumerate(demandas):
+            pedido = self.decisao(dia, estoque)
+            custo_hoje, estoque = modelo.calcular_custo(estoque, demanda, pedido)
+            custo_total += custo_hoje
             decisoes.append(pedido)
-            _, estoque = self.calcular_custo(estoque, self.consumo[dia], pedido)
+        return custo_total, decisoes
+
+
+def _resolver_bloco(bloco, solver, engine):
+    """Executado em cada processo: resolve um bloco de itens [(nome, consumo, custos, estoque_inicial)]"""
+    resultados = []
+    for nome, consumo, custos, estoque_inicial in bloco:
+        resultados.append((nome, solver(consumo, **custos).iterativo(estoque_inicial, engine=engine)))
+    return resultados
+
+
+def planejar_lote(consumos, custos=None, estoques=None, max_workers=None, tamanho_bloco=None,
+                  solver=ProgramacaoDinamica, engine="python"):
+    """
+    Planeja vários insumos em paralelo num pool de processos
+    
+    consumos: {nome: consumo_diario}
+    custos: {nome: {'custo_pedido': ..., 'custo_falta': ..., 'passo_pedido': ...}} (opcional,
+            qualquer argumento do construtor do solver)
+    estoques: {nome: estoque_inicial} (opcional, padrão 0)
+    max_workers: processos do pool (padrão: núcleos disponíveis); 1 resolve no próprio processo
+    tamanho_bloco: itens enviados por tarefa (padrão: ~4 blocos por processo)
+    
+    Gera (nome, (custo_total, decisoes)) à medida que cada bloco termina, fora de ordem
+    """
+    custos = custos or {}
+    estoques = estoques or {}
+    itens = [(nome, consumo, custos.get(nome, {}), estoques.get(nome, 0))
+             for nome, consumo in consumos.items()]
+    if not itens:
+        return
+    
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    if tamanho_bloco is None:
+        tamanho_bloco = max(1, -(-len(itens) // (max_workers * 4)))
+    blocos = [itens[i:i + tamanho_bloco] for i in range(0, len(itens), tamanho_bloco)]
+    
+    if max_workers == 1:
+        for bloco in blocos:
+            yield from _resolver_bloco(bloco, solver, engine)
+        return
+    
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        tarefas = [executor.submit(_resolver_bloco, bloco, solver, engine) for bloco in blocos]
+        for tarefa in as_completed(tarefas):
+            yield from tarefa.result()
+
+
+class PlanejadorIncremental(ProgramacaoDinamica):
+    """
+    Replanejamento em horizonte rolante sem refazer a PD inteira
+    
+    Formulação progressiva: linha t guarda, para cada estoque e, o menor custo para chegar
+    ao início do dia t da janela com estoque e (mais o ponteiro para o estado anterior).
+    - append_day(consumo): calcula só a linha do dia novo
+    - advance(pedido=None): compromete o primeiro dia e descarta a linha dele, sem recalcular.
+      As linhas seguintes continuam enraizadas no estado antigo e viram limites inferiores;
+      se o caminho ótimo ainda passa pelo estoque comprometido ele é o ótimo de verdade,
+      senão a janela é recalculada a partir do estado atual (contado em `recalculos`)
+    
+    A capacidade fica fixa (padrão: 3 × maior consumo) e só cresce, com recálculo,
+    se chegar um dia que exija mais.
+    """
+    
+    def __init__(self, consumo_diario, estoque_inicial=0, custo_pedido=100, custo_armazenamento=1,
+                 custo_falta=50, capacidade_max=None, passo_pedido=10):
+        super().__init__(list(consumo_diario), custo_pedido, custo_armazenamento, custo_falta,
+                         capacidade_max, passo_pedido)
+        self._capacidade_automatica = capacidade_max is None
+        self.estoque = estoque_inicial
+        self.recalculos = 0
+        self._reenraizar()
+    
+    def append_day(self, consumo):
+        """Acrescenta um dia de consumo ao fim da janela"""
+        self.consumo.append(consumo)
+        self.dias += 1
+        
+        if self._capacidade_automatica and consumo * 3 > self.capacidade_max:
+            self.capacidade_max = consumo * 3
+            self._valido = False
+        if self._valido:
+            self._linhas.append(self._linha_seguinte(self._linhas[-1][0], consumo))
+    
+    def advance(self, pedido=None):
+        """
+        Compromete o primeiro dia da janela (com o pedido do plano atual, ou o informado)
+        Retorna (pedido, custo_do_dia)
+        """
+        if not self.consumo:
+            raise IndexError("Janela de planejamento vazia")
+        if pedido is None:
+            pedido = self.plano()[1][0]
+        
+        custo_dia, novo_estoque = self.calcular_custo(self.estoque, self.consumo[0], pedido)
+        if novo_estoque > self.capacidade_max:
+            raise ValueError(f"Pedido {pedido} ultrapassa a capacidade máxima ({self.capacidade_max})")
+        
+        if self._valido:
+            _, anterior, escolha = self._linhas[1]
+            seguiu_caminho = (anterior[novo_estoque] == self.estoque
+                              and self.passo_pedido * escolha[novo_estoque] == pedido)
+            self._linhas.popleft()
+            self._valido = seguiu_caminho
+        
+        self.estoque = novo_estoque
+        self.consumo.pop(0)
+        self.dias -= 1
+        return pedido, custo_dia
+    
+    def plano(self):
+        """Plano ótimo para a janela atual a partir do estoque atual: (custo_total, decisoes)"""
+        if not self._valido:
+            self._reenraizar()
+        
+        ultima = self._linhas[-1][0]
+        melhor = min(range(len(ultima)), key=ultima.__getitem__)
+        
+        decisoes = []
+        estoque = melhor
+        for _, anterior, escolha in reversed(list(self._linhas)[1:]):
+            decisoes.append(self.passo_pedido * escolha[estoque])
+            estoque = anterior[estoque]
+        decisoes.reverse()
         
+        if estoque != self.estoque:
+            self._reenraizar()
+            return self.plano()
+        
+        custo_total = 0
+        for dia, pedido in enumerate(decisoes):
+            custo_hoje, estoque = self.calcular_custo(estoque, self.consumo[dia], pedido)
+            custo_total += custo_hoje
         return custo_total, decisoes
+    
+    def _reenraizar(self):
+        """Recalcula todas as linhas da janela a partir do estado atual"""
+        raiz = array('d', [float('inf')]) * (self.capacidade_max + 1)
+        raiz[self.estoque] = 0
+        self._linhas = deque([(raiz, None, None)])
+        for consumo in self.consumo:
+            self._linhas.append(self._linha_seguinte(self._linhas[-1][0], consumo))
+        self._valido = True
+        self.recalculos += 1
+    
+    def _linha_seguinte(self, linha, consumo):
+        """Relaxa todas as transições de um dia: (custos, estoque anterior, índice do pedido)"""
+        pedidos = self.pedidos_possiveis()
+        estados = self.capacidade_max + 1
+        nova = array('d', [float('inf')]) * estados
+        anterior = array_zerado('I', estados)
+        escolha = array_zerado(tipo_indice(len(pedidos)), estados)
+        
+        for estoque, custo_ate_aqui in enumerate(linha):
+            if custo_ate_aqui == float('inf'):
+                continue
+            for indice, pedido in enumerate(pedidos):
+                custo_hoje, novo_estoque = self.calcular_custo(estoque, consumo, pedido)
+                if novo_estoque > self.capacidade_max:
+                    break
+                
+                custo_total = custo_ate_aqui + custo_hoje
+                if custo_total < nova[novo_estoque]:
+                    nova[novo_estoque] = custo_total
+                    anterior[novo_estoque] = estoque
+                    escolha[novo_estoque] = indice
+        
+        return nova, anterior, escolha
+
+
+def varredura_custos(consumo_diario, custos_pedido=(100,), custos_armazenamento=(1,), custos_falta=(50,),
+                     estoque_inicial=0, capacidade_max=None, passo_pedido=10):
+    """
+    Resolve de uma vez a PD para todas as combinações de custos (produto cartesiano dos vetores)
+    
+    O que não depende dos custos (estoque final, falta, destino e viabilidade de cada par
+    estoque × pedido) é calculado uma vez por dia; os custos entram como um eixo extra
+    dos arrays, e todas as combinações descem juntas pela mesma recorrência de iterativo().
+    
+    Retorna uma lista de dicionários (um por combinação) com os três custos,
+    'custo_total' e 'decisoes', na ordem do produto cartesiano.
+    """
+    np = _importar_numpy()
+    
+    combinacoes = list(product(custos_pedido, custos_armazenamento, custos_falta))
+    modelos = [ProgramacaoDinamica(consumo_diario, *custos, capacidade_max=capacidade_max, passo_pedido=passo_pedido)
+               for custos in combinacoes]
+    base = modelos[0]
+    
+    cp, ca, cf = (np.array(coluna, dtype=float)[:, None, None] for coluna in zip(*combinacoes))
+    estoques = np.arange(base.capacidade_max + 1)
+    pedidos = np.arange(0, base.capacidade_max + 1, base.passo_pedido)
+    pede = (pedidos > 0).astype(float)
+    bloco = max(1, LIMITE_ELEMENTOS_NUMPY // (len(pedidos) * len(combinacoes)))
+    
+    futuro = np.zeros((len(combinacoes), base.capacidade_max + 1))
+    escolhas = np.zeros((len(combinacoes), base.dias, base.capacidade_max + 1), dtype=tipo_indice(len(pedidos)))
+    
+    for dia in range(base.dias - 1, -1, -1):
+        atual = np.empty_like(futuro)
+        for inicio in range(0, len(estoques), bloco):
+            faixa = estoques[inicio:inicio + bloco]
+            estoque_final = faixa[:, None] - base.consumo[dia] + pedidos[None, :]
+            sobra = np.maximum(estoque_final, 0)
+            falta = np.maximum(-estoque_final, 0)
+            viavel = sobra <= base.capacidade_max
+            destino = np.where(viavel, sobra, 0)
+            
+            custo = cp * pede + ca * sobra + cf * falta
+            total = np.where(viavel, custo + futuro[:, destino], np.inf)
+            
+            melhor = total.argmin(axis=2)
+            escolhas[:, dia, inicio:inicio + bloco] = melhor
+            atual[:, inicio:inicio + bloco] = np.take_along_axis(total, melhor[:, :, None], axis=2)[:, :, 0]
+        futuro = atual
+    
+    tabela = []
+    for n, (modelo, custos) in enumerate(zip(modelos, combinacoes)):
+        decisoes = modelo._reconstruir(lambda d, e: int(pedidos[escolhas[n, d, e]]), 0, estoque_inicial)
+        tabela.append({
+            'custo_pedido': custos[0],
+            'custo_armazenamento': custos[1],
+            'custo_falta': custos[2],
+            'custo_total': modelo._custo_plano(estoque_inicial, decisoes),
+            'decisoes': decisoes,
+        })
+    return tabela
+
+
+def chave_solucao(pd, estoque_inicial=0):
+    """Chave canônica de uma solução: solver, consumo, custos, capacidade, passo do pedido e estoque inicial"""
+    return json.dumps([
+        type(pd).__name__,
+        list(pd.consumo),
+        pd.custo_pedido,
+        pd.custo_armazenamento,
+        pd.custo_falta,
+        pd.capacidade_max,
+        pd.passo_pedido,
+        estoque_inicial,
+    ], separators=(',', ':'))
+
+
+class CacheSolucoes:
+    """
+    Cache de soluções da Programação Dinâmica
+    
+    Memória: LRU (OrderedDict) limitado a `max_entradas`, descartando a menos usada
+    Disco (opcional): tabela sqlite em `caminho`, que sobrevive entre execuções
+    Estatísticas de acertos/falhas em estatisticas()
+    """
+    
+    def __init__(self, max_entradas=1024, caminho=None):
+        self.max_entradas = max_entradas
+        self._memoria = OrderedDict()
+        self.acertos_memoria = 0
+        self.acertos_disco = 0
+        self.falhas = 0
+        self.descartes = 0
+        
+        self._banco = None
+        if caminho is not None:
+            import sqlite3
+            self._banco = sqlite3.connect(caminho)
+            self._banco.execute(
+                "CREATE TABLE IF NOT EXISTS solucoes (chave TEXT PRIMARY KEY, solucao TEXT NOT NULL)"
+            )
+            self._banco.commit()
+    
+    def resolver(self, pd, estoque_inicial=0, engine="python"):
+        """Mesmo resultado de pd.iterativo(estoque_inicial), consultando o cache antes de resolver"""
+        chave = chave_solucao(pd, estoque_inicial)
+        
+        if chave in self._memoria:
+            self._memoria.move_to_end(chave)
+            self.acertos_memoria += 1
+            custo, decisoes = self._memoria[chave]
+            return custo, list(decisoes)
+        
+        if self._banco is not None:
+            linha = self._banco.execute("SELECT solucao FROM solucoes WHERE chave = ?", (chave,)).fetchone()
+            if linha is not None:
+                self.acertos_disco += 1
+                custo, decisoes = json.loads(linha[0])
+                self._guardar(chave, custo, decisoes)
+                return custo, decisoes
+        
+        self.falhas += 1
+        custo, decisoes = pd.iterativo(estoque_inicial, engine=engine)
+        self._guardar(chave, custo, decisoes)
+        if self._banco is not None:
+            self._banco.execute("INSERT OR REPLACE INTO solucoes VALUES (?, ?)",
+                                (chave, json.dumps([custo, decisoes])))
+            self._banco.commit()
+        return custo, decisoes
+    
+    def _guardar(self, chave, custo, decisoes):
+        self._memoria[chave] = (custo, tuple(decisoes))
+        self._memoria.move_to_end(chave)
+        while len(self._memoria) > self.max_entradas:
+            self._memoria.popitem(last=False)
+            self.descartes += 1
+    
+    def estatisticas(self):
+        consultas = self.acertos_memoria + self.acertos_disco + self.falhas
+        return {
+            'consultas': consultas,
+            'acertos_memoria': self.acertos_memoria,
+            'acertos_disco': self.acertos_disco,
+            'falhas': self.falhas,
+            'descartes': self.descartes,
+            'entradas_memoria': len(self._memoria),
+            'taxa_acerto': (consultas - self.falhas) / consultas if consultas else 0.0,
+        }
+    
+    def limpar(self):
+        """Esvazia a memória e o disco (as estatísticas são mantidas)"""
+        self._memoria.clear()
+        if self._banco is not None:
+            self._banco.execute("DELETE FROM solucoes")
+            self._banco.commit()
+    
+    def fechar(self):
+        if self._banco is not None:
+            self._banco.close()
+            self._banco = None
+
+
+class RegistroMetricas:
+    """
+    Registro de métricas de instrumentação: contadores, máximos e tempos (soma e contagem)
+    
+    Cada métrica tem um nome e rótulos opcionais (ex.: algoritmo='merge').
+    Exporta em JSON (como_dict / exportar_json) ou no formato texto do Prometheus.
+    As atualizações passam por uma trava: vários threads podem usar o mesmo registro.
+    """
+    
+    def __init__(self, prefixo='insumos'):
+        self.prefixo = prefixo
+        self.contadores = {}
+        self.maximos = {}
+        self.tempos = {}
+        self._trava = threading.Lock()
+    
+    def incrementar(self, nome, valor=1, **rotulos):
+        chave = (nome, tuple(sorted(rotulos.items())))
+        with self._trava:
+            self.contadores[chave] = self.contadores.get(chave, 0) + valor
+    
+    def maximo(self, nome, valor, **rotulos):
+        chave = (nome, tuple(sorted(rotulos.items())))
+        with self._trava:
+            if valor > self.maximos.get(chave, valor - 1):
+                self.maximos[chave] = valor
+    
+    def registrar_tempo(self, nome, segundos, **rotulos):
+        chave = (nome, tuple(sorted(rotulos.items())))
+        with self._trava:
+            soma, contagem = self.tempos.get(chave, (0.0, 0))
+            self.tempos[chave] = (soma + segundos, contagem + 1)
+    
+    @contextmanager
+    def cronometro(self, nome, **rotulos):
+        """Mede o tempo de parede do bloco"""
+        inicio = perf_counter()
+        try:
+            yield
+        finally:
+            self.registrar_tempo(nome, perf_counter() - inicio, **rotulos)
+    
+    def limpar(self):
+        with self._trava:
+            self.contadores.clear()
+            self.maximos.clear()
+            self.tempos.clear()
+    
+    @staticmethod
+    def _rotulos(rotulos):
+        """{chave="valor",...} com \\, " e quebras de linha escapados como pede o Prometheus"""
+        if not rotulos:
+            return ''
+        return '{' + ','.join(f'{chave}="{_escapar_rotulo(valor)}"' for chave, valor in rotulos) + '}'
+    
+    def como_dict(self):
+        """{'contadores': {...}, 'maximos': {...}, 'tempos': {nome: {'soma': s, 'contagem': n}}}"""
+        return {
+            'contadores': {nome + self._rotulos(r): valor for (nome, r), valor in sorted(self.contadores.items())},
+            'maximos': {nome + self._rotulos(r): valor for (nome, r), valor in sorted(self.maximos.items())},
+            'tempos': {nome + self._rotulos(r): {'soma': soma, 'contagem': contagem}
+                       for (nome, r), (soma, contagem) in sorted(self.tempos.items())},
+        }
+    
+    def exportar_json(self, caminho=None):
+        """Texto JSON das métricas (gravado em `caminho`, se informado)"""
+        texto = json.dumps(self.como_dict(), indent=2, ensure_ascii=False)
+        if caminho is not None:
+            with open(caminho, 'w', encoding='utf-8') as arquivo:
+                arquivo.write(texto)
+        return texto
+    
+    def exportar_prometheus(self):
+        """Formato de exposição em texto do Prometheus (contadores, gauges e summaries)"""
+        linhas = []
+        
+        def serie(tipo, metricas, formatar):
+            vistos = set()
+            for (nome, rotulos), valor in sorted(metricas.items()):
+                completo = f'{self.prefixo}_{nome}'
+                if completo not in vistos:
+                    vistos.add(completo)
+                    linhas.append(f'# TYPE {completo} {tipo}')
+                linhas.extend(formatar(completo, self._rotulos(rotulos), valor))
+        
+        serie('counter', self.contadores, lambda nome, r, valor: [f'{nome}{r} {valor}'])
+        serie('gauge', self.maximos, lambda nome, r, valor: [f'{nome}{r} {valor}'])
+        serie('summary', self.tempos, lambda nome, r, valor: [f'{nome}_sum{r} {valor[0]:.9f}',
+                                                              f'{nome}_count{r} {valor[1]}'])
+        return '\n'.join(linhas) + '\n'
+
+
+METRICAS = RegistroMetricas()
+
+
+def _escapar_rotulo(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class _ChaveContada:
+    """Chave de ordenação que conta as comparações feitas com ela (só sob instrumentar())"""
+    __slots__ = ('chave', 'contador')
+    
+    def __init__(self, chave, contador):
+        self.chave = chave
+        self.contador = contador
+    
+    def __lt__(self, outra):
+        self.contador[0] += 1
+        return self.chave < outra.chave
+
+
+def transicoes_pd(pd, estados):
+    """
+    (avaliadas, podadas) das transições de pd a partir dos estados (dia, estoque)
+    Uma transição é podada quando novo_estoque > capacidade_max; a contagem é aritmética,
+    sem refazer a PD: os pedidos válidos são os <= capacidade - estoque + consumo
+    """
+    total = len(pd.pedidos_possiveis())
+    avaliadas = podadas = 0
+    for dia, estoque in estados:
+        validos = min(total, (pd.capacidade_max - estoque + pd.consumo[dia]) // pd.passo_pedido + 1)
+        avaliadas += validos
+        podadas += total - validos
+    return avaliadas, podadas
+
+
+class _Medicao:
+    """Estado de um bloco instrumentar() no contexto atual (thread ou tarefa asyncio)"""
+    __slots__ = ('registro', 'comparacoes', 'algoritmo', 'reconstruir')
+    
+    def __init__(self, registro):
+        self.registro = registro
+        self.comparacoes = None
+        self.algoritmo = None
+        self.reconstruir = 0.0
 
 
-def gerar_dados_simulados(num_registros=20):
-    """Gera dados simulados de consumo de insumos"""
+_MEDICAO = ContextVar('medicao', default=None)
+
+
+def _contar_comparacoes(chaves):
+    """Durante uma ordenação medida, embrulha as chaves em _ChaveContada; fora dela, devolve as mesmas"""
+    medicao = _MEDICAO.get()
+    if medicao is None or medicao.comparacoes is None:
+        return chaves
+    return [_ChaveContada(chave, medicao.comparacoes) for chave in chaves]
+
+
+def _medir_ordenacao(medicao, lista, criterios, decrescente, algoritmo, no_lugar):
+    """ordenar() sob instrumentar(): tempo, comparações de chaves e profundidade por algoritmo"""
+    registro = medicao.registro
+    rotulo = 'colunas' if isinstance(lista, InsumoStore) else algoritmo
+    if rotulo == 'merge':
+        corridas = -(-len(lista) // TAMANHO_CORRIDA)
+        registro.maximo('ordenacao_profundidade_maxima', max(corridas - 1, 0).bit_length(), algoritmo=rotulo)
+    medicao.comparacoes, medicao.algoritmo = [0], rotulo
+    try:
+        with registro.cronometro('ordenacao_segundos', algoritmo=rotulo):
+            return _ordenar(lista, criterios, decrescente, algoritmo, no_lugar)
+    finally:
+        registro.incrementar('ordenacao_comparacoes_total', medicao.comparacoes[0], algoritmo=rotulo)
+        registro.incrementar('ordenacao_chamadas_total', algoritmo=rotulo)
+        medicao.comparacoes = medicao.algoritmo = None
+
+
+def _medir_fases(medicao, rotulo, metodo, pd, *argumentos):
+    """Roda o solver separando o tempo de reconstrução das decisões (solvers aninhados contam como resolver)"""
+    anterior, medicao.reconstruir = medicao.reconstruir, 0.0
+    inicio = perf_counter()
+    try:
+        return metodo(pd, *argumentos)
+    finally:
+        total = perf_counter() - inicio
+        medicao.registro.registrar_tempo('pd_fase_segundos', total - medicao.reconstruir, metodo=rotulo, fase='resolver')
+        medicao.registro.registrar_tempo('pd_fase_segundos', medicao.reconstruir, metodo=rotulo, fase='reconstruir')
+        medicao.reconstruir = anterior
+
+
+def _medir_memo(medicao, rotulo, metodo, pd, dia=0, estoque=0, memo=None):
+    """Solvers com memo: estados, transições e acertos/faltas saem das entradas novas do memo"""
+    memo = {} if memo is None else memo
+    antes = len(memo)
+    resultado = _medir_fases(medicao, rotulo, metodo, pd, dia, estoque, memo)
+    
+    registro = medicao.registro
+    novos = list(islice(memo, antes, None))
+    avaliadas, podadas = transicoes_pd(pd, novos)
+    consultas = (1 if dia < pd.dias else 0) + transicoes_pd(pd, [(d, e) for d, e in novos if d < pd.dias - 1])[0]
+    registro.incrementar('pd_estados_total', len(novos), metodo=rotulo)
+    registro.incrementar('pd_transicoes_total', avaliadas + podadas, metodo=rotulo)
+    registro.incrementar('pd_transicoes_podadas_total', podadas, metodo=rotulo)
+    registro.incrementar('pd_memo_faltas_total', len(novos), metodo=rotulo)
+    registro.incrementar('pd_memo_acertos_total', consultas - len(novos), metodo=rotulo)
+    return resultado
+
+
+def _medir_tabela(medicao, rotulo, transicoes, metodo, pd, estoque_inicial=0, engine="python"):
+    """Solvers bottom-up: todos os estados da tabela; transições só onde são enumeradas"""
+    rotulo = f'{rotulo}_{engine}'
+    resultado = _medir_fases(medicao, rotulo, metodo, pd, estoque_inicial, engine)
+    
+    registro = medicao.registro
+    estados = [(dia, estoque) for dia in range(pd.dias) for estoque in range(pd.capacidade_max + 1)]
+    registro.incrementar('pd_estados_total', len(estados), metodo=rotulo)
+    if transicoes:
+        avaliadas, podadas = transicoes_pd(pd, estados)
+        registro.incrementar('pd_transicoes_total', avaliadas + podadas, metodo=rotulo)
+        registro.incrementar('pd_transicoes_podadas_total', podadas, metodo=rotulo)
+    return resultado
+
+
+@contextmanager
+def instrumentar(registro=None):
+    """
+    Liga a instrumentação dentro do bloco, só para o contexto atual (o thread que abriu o
+    bloco e as tarefas asyncio criadas nele); outros threads seguem sem medir
+    
+    Nada é trocado: comparar, ordenar() e os solvers de PD consultam uma ContextVar em pontos
+    fixos e, fora do bloco, seguem direto (uma consulta por chamada, nada dentro dos laços):
+    - comparar_chamadas_total: chamadas diretas de comparar (e de merge); o motor de
+      ordenação compara chaves pré-calculadas, contadas em ordenacao_comparacoes_total
+    - ordenacao_comparacoes_total, ordenacao_chamadas_total, ordenacao_profundidade_maxima,
+      ordenacao_segundos (rótulo algoritmo: timsort, merge, intro ou colunas para InsumoStore);
+      a profundidade é o número de níveis de partição do introsort e o de passadas do merge sort
+    - pd_estados_total e pd_fase_segundos (fases resolver e reconstruir) de recursivo,
+      recursivo_pilha, iterativo e PoliticaSS.iterativo (rótulo metodo); transições avaliadas e
+      podadas, acertos e faltas do memo onde o solver as enumera, calculadas depois da solução
+      a partir do memo/tabela, sem contadores dentro dos laços
+    Produz o registro usado (METRICAS, se nenhum for dado).
+    """
+    registro = METRICAS if registro is None else registro
+    token = _MEDICAO.set(_Medicao(registro))
+    try:
+        yield registro
+    finally:
+        _MEDICAO.reset(token)
+
+
+def _importar_numpy():
+    """Importa o NumPy sob demanda (dependência opcional, usada só pelos modos vetorizados)"""
+    try:
+        import numpy
+    except ImportError as erro:
+        raise ImportError("Este modo requer o pacote numpy (pip install numpy)") from erro
+    return numpy
+
+
+DATA_BASE_SIMULADA = datetime(2024, 1, 1)
+
+
+def gerar_dados_simulados(num_registros=20, semente=None):
+    """
+    Gera dados simulados de consumo de insumos
+    semente: resultados reprodutíveis, inclusive as datas (terminam em DATA_BASE_SIMULADA, não hoje)
+    """
+    gerador = random if semente is None else random.Random(semente)
     insumos_tipos = [
         "Reagente PCR",
         "Seringa 5ml",
@@ -300,13 +3379,14 @@ def gerar_dados_simulados(num_registros=20):
     ]
     
     dados = []
-    data_inicio = datetime.now() - timedelta(days=num_registros)
+    data_final = datetime.now() if semente is None else DATA_BASE_SIMULADA
+    data_inicio = data_final - timedelta(days=num_registros)
     
     for i in range(num_registros):
-        nome = random.choice(insumos_tipos)
-        quantidade = random.randint(5, 200)
+        nome = gerador.choice(insumos_tipos)
+        quantidade = gerador.randint(5, 200)
         data = data_inicio + timedelta(days=i)
-        validade_dias = random.randint(15, 60)
+        validade_dias = gerador.randint(15, 60)
         
         insumo = Insumo(nome, quantidade, data, validade_dias)
         dados.append(insumo)
@@ -340,9 +3420,7 @@ def exibir_menu_principal():
 def menu_fila(dados):
     """Menu para operações com Fila"""
     fila = Fila()
-    
-    for insumo in dados:
-        fila.enfileirar(insumo)
+    fila.enfileirar_lote(dados)
     
     while True:
         limpar_tela()
@@ -361,12 +3439,10 @@ def menu_fila(dados):
             print("\n" + "=" * 70)
             print(" FILA COMPLETA ".center(70))
             print("=" * 70)
-            items = fila.ver_todos()
-            if items:
-                for i, item in enumerate(items, 1):
-                    print(f"{i:2d}. {item}")
-            else:
+            if fila.esta_vazia():
                 print("Fila vazia!")
+            for i, item in enumerate(fila, 1):
+                print(f"{i:2d}. {item}")
             input("\n[Pressione ENTER para continuar]")
         
         elif opcao == "2":
@@ -489,20 +3565,21 @@ def menu_busca_sequencial(dados):
     input("\n[Pressione ENTER para continuar]")
 
 
-def menu_busca_binaria(dados):
-    """Menu para busca binária"""
+def menu_busca_binaria(indice_nome):
+    """Menu para busca binária (sobre a visão ordenada por nome mantida pelo main)"""
     limpar_tela()
     print("=" * 70)
     print(" BUSCA BINÁRIA ".center(70))
     print("=" * 70)
-    print("\nBusca otimizada (requer lista ordenada por nome)\n")
+    print("\nBusca otimizada (índice ordenado por nome, sem reordenar a cada busca)\n")
     
-    dados_ordenados = merge_sort(dados.copy(), 'nome')
-    
-    print("Ordenando dados por nome...")
     nome = input("Digite o nome do insumo para buscar: ").strip()
     
-    resultados = busca_binaria(dados_ordenados, nome)
+    resultados = busca_binaria(indice_nome, nome)
+    if not resultados and nome:
+        sugestoes = indice_nome.nomes_com_prefixo(nome)
+        if sugestoes:
+            print(f"\nVocê quis dizer: {', '.join(sugestoes)}?")
     
     print("\n" + "=" * 70)
     print(f" RESULTADOS ({len(resultados)} encontrado(s)) ".center(70))
@@ -575,18 +3652,37 @@ def menu_quick_sort(dados):
     input("\n[Pressione ENTER para continuar]")
 
 
-def menu_programacao_dinamica():
-    """Menu para Programação Dinâmica"""
+def menu_programacao_dinamica(dados):
+    """Menu para Programação Dinâmica (demanda agregada dos registros de consumo)"""
     limpar_tela()
     print("=" * 70)
     print(" PROGRAMAÇÃO DINÂMICA - Otimização de Estoque ".center(70))
     print("=" * 70)
     print("\nProblema: Minimizar custos de pedido, armazenamento e falta\n")
     
+    try:
+        agregador = AgregadorConsumo(dados)
+    except ImportError as erro:
+        print(erro)
+        input("\n[Pressione ENTER para continuar]")
+        return
+    if not len(agregador):
+        print("Nenhum registro de consumo para planejar.")
+        input("\n[Pressione ENTER para continuar]")
+        return
+    
+    totais = sorted(agregador.totais().items(), key=lambda item: -item[1])
+    print("Insumos registrados:")
+    for i, (nome, total) in enumerate(totais, 1):
+        print(f"  {i}. {nome:20s} {total:6d} unidades")
+    escolha = input("\nInsumo a planejar (ENTER = maior consumo): ").strip()
+    nome = totais[int(escolha) - 1][0] if escolha.isdigit() and 1 <= int(escolha) <= len(totais) else totais[0][0]
+    
     dias = 10
-    consumo_diario = [random.randint(20, 100) for _ in range(dias)]
+    fim = agregador.inicio + timedelta(days=agregador.dias - 1)
+    consumo_diario = agregador.serie(nome, inicio=fim - timedelta(days=dias - 1))
     
-    print("Consumo diário simulado:")
+    print(f"\nConsumo diário de {nome} (últimos {len(consumo_diario)} dias dos registros):")
     for i, consumo in enumerate(consumo_diario, 1):
         print(f"  Dia {i}: {consumo} unidades")
     
@@ -643,8 +3739,10 @@ def visualizar_dados(dados):
 
 
 def main():
-    """Função principal do programa"""
+    """Função principal do programa (menus interativos)"""
+    os.system("clear")
     dados = gerar_dados_simulados(20)
+    indice_nome = IndiceOrdenado(dados)
     
     while True:
         limpar_tela()
@@ -659,13 +3757,13 @@ def main():
         elif opcao == "3":
             menu_busca_sequencial(dados)
         elif opcao == "4":
-            menu_busca_binaria(dados)
+            menu_busca_binaria(indice_nome)
         elif opcao == "5":
             menu_merge_sort(dados)
         elif opcao == "6":
             menu_quick_sort(dados)
         elif opcao == "7":
-            menu_programacao_dinamica()
+            menu_programacao_dinamica(dados)
         elif opcao == "8":
             num = input("\nQuantos registros gerar? (padrão 20): ").strip()
             try:
@@ -675,6 +3773,7 @@ def main():
             except ValueError:
                 print("\nValor inválido, gerando 20 registros...")
                 dados = gerar_dados_simulados(20)
+            indice_nome = IndiceOrdenado(dados)
             input("\n[Pressione ENTER para continuar]")
         elif opcao == "9":
             visualizar_dados(dados)
@@ -688,5 +3787,235 @@ def main():
             input("\n[Pressione ENTER para continuar]")
 
 
+EXTENSOES_BINARIAS = ('.bin', '.insumos')
+
+
+def formato_arquivo(caminho, formato=None):
+    """'bin', 'jsonl' ou 'csv', pelo parâmetro ou pela extensão do arquivo"""
+    if formato:
+        return formato
+    caminho = str(caminho).lower()
+    if caminho.endswith(EXTENSOES_BINARIAS):
+        return 'bin'
+    if caminho.endswith(('.jsonl', '.ndjson')):
+        return 'jsonl'
+    return 'csv'
+
+
+def ler_registros(caminho, formato=None, formato_data=None, processos=1):
+    """Insumo de um arquivo em qualquer formato suportado (o binário volta como InsumoStore)"""
+    formato = formato_arquivo(caminho, formato)
+    if formato == 'bin':
+        return abrir_registros(caminho)
+    return fluxo_registros(caminho, formato, formato_data, processos)
+
+
+def gravar_fluxo(caminho, registros, formato=None, tamanho_pedaco=TAMANHO_PEDACO_INGESTAO):
+    """
+    Grava insumos em fluxo (sem montar lista) como binário, CSV ou JSONL; '-' escreve na saída padrão
+    Retorna quantos registros foram gravados
+    """
+    formato = formato_arquivo(caminho, formato)
+    if formato == 'bin':
+        if isinstance(registros, InsumoStore):
+            return gravar_registros(caminho, registros)
+        with EscritorRegistros(caminho) as escritor:
+            for pedaco in em_pedacos(registros, tamanho_pedaco):
+                escritor.escrever(pedaco)
+        return escritor.registros
+    
+    saida = sys.stdout if caminho == '-' else open(caminho, 'w', encoding='utf-8', newline='')
+    try:
+        total = 0
+        if formato == 'csv':
+            escritor = csv.writer(saida)
+            escritor.writerow(COLUNAS_INGESTAO)
+            for insumo in registros:
+                escritor.writerow((insumo.nome, insumo.quantidade, insumo.data.isoformat(), insumo.validade.isoformat()))
+                total += 1
+        else:
+            for insumo in registros:
+                saida.write(json.dumps({'nome': insumo.nome, 'quantidade': insumo.quantidade,
+                                        'data': insumo.data.isoformat(), 'validade': insumo.validade.isoformat()},
+                                       ensure_ascii=False) + '\n')
+                total += 1
+        return total
+    finally:
+        if saida is not sys.stdout:
+            saida.close()
+
+
+def ler_itens_plano(caminho):
+    """
+    Itens para planejar_lote, de um CSV ou JSONL com uma linha por insumo
+    Campos: nome, consumo (lista; no CSV, valores separados por ';' ou espaço),
+    estoque_inicial e os argumentos do construtor (custo_pedido, custo_falta, passo_pedido, ...)
+    Retorna (consumos, custos, estoques)
+    """
+    formato = formato_arquivo(caminho)
+    if formato == 'jsonl':
+        linhas = (json.loads(linha) for linha in ler_linhas(caminho) if linha.strip())
+    else:
+        linhas = csv.DictReader(ler_linhas(caminho))
+    
+    consumos, custos, estoques = {}, {}, {}
+    for numero, item in enumerate(linhas, 1):
+        try:
+            nome = item['nome']
+            consumo = item['consumo']
+            if isinstance(consumo, str):
+                consumo = consumo.replace(';', ' ').split()
+            consumos[nome] = [int(valor) for valor in consumo]
+            if item.get('estoque_inicial') not in (None, ''):
+                estoques[nome] = int(item['estoque_inicial'])
+            parametros = {chave: int(item[chave]) for chave in
+                          ('custo_pedido', 'custo_armazenamento', 'custo_falta', 'capacidade_max', 'passo_pedido')
+                          if item.get(chave) not in (None, '')}
+        except (KeyError, TypeError, ValueError) as erro:
+            raise ValueError(f"{caminho}, item {numero}: {erro}") from None
+        if not consumos[nome]:
+            raise ValueError(f"{caminho}, item {numero}: consumo vazio")
+        if parametros:
+            custos[nome] = parametros
+    return consumos, custos, estoques
+
+
+def _cli_ordenar(argumentos):
+    criterios = tuple(argumentos.por.split(','))
+    registros = ler_registros(argumentos.entrada, argumentos.formato_entrada, argumentos.formato_data)
+    if isinstance(registros, InsumoStore):
+        ordenados = ordenar(registros, criterios, argumentos.decrescente)
+    else:
+        ordenados = ordenar_externo(registros, criterios, argumentos.decrescente,
+                                    max_registros_memoria=argumentos.memoria)
+    total = gravar_fluxo(argumentos.saida, ordenados, argumentos.formato_saida)
+    print(f"{total} registros ordenados por {argumentos.por}", file=sys.stderr)
+    return 0
+
+
+def _cli_buscar(argumentos):
+    registros = ler_registros(argumentos.entrada, argumentos.formato_entrada, argumentos.formato_data)
+    alvo = normalizar_nome(argumentos.nome)
+    if argumentos.prefixo:
+        encontrados = (insumo for insumo in registros if normalizar_nome(insumo.nome).startswith(alvo))
+    elif isinstance(registros, InsumoStore):
+        np = _importar_numpy()
+        codigos = [codigo for codigo, nome in enumerate(registros.nomes) if normalizar_nome(nome) == alvo]
+        encontrados = registros.selecionar(np.flatnonzero(np.isin(registros.codigos, codigos)))
+    else:
+        encontrados = (insumo for insumo in registros if normalizar_nome(insumo.nome) == alvo)
+    if argumentos.limite is not None:
+        encontrados = islice(encontrados, argumentos.limite)
+    total = gravar_fluxo(argumentos.saida, encontrados, argumentos.formato_saida or 'jsonl')
+    print(f"{total} registro(s) encontrado(s)", file=sys.stderr)
+    return 0
+
+
+def _cli_planejar(argumentos):
+    consumos, custos, estoques = ler_itens_plano(argumentos.itens)
+    solver = PoliticaSS if argumentos.solver == 'ss' else ProgramacaoDinamica
+    saida = sys.stdout if argumentos.saida == '-' else open(argumentos.saida, 'w', encoding='utf-8')
+    try:
+        for nome, (custo, decisoes) in planejar_lote(consumos, custos, estoques, max_workers=argumentos.workers,
+                                                     solver=solver, engine=argumentos.engine):
+            saida.write(json.dumps({'nome': nome, 'custo': custo, 'decisoes': decisoes}, ensure_ascii=False) + '\n')
+    finally:
+        if saida is not sys.stdout:
+            saida.close()
+    print(f"{len(consumos)} insumo(s) planejado(s)", file=sys.stderr)
+    return 0
+
+
+def _cli_converter(argumentos):
+    registros = ler_registros(argumentos.entrada, argumentos.formato_entrada, argumentos.formato_data,
+                              argumentos.processos)
+    total = gravar_fluxo(argumentos.saida, registros, argumentos.formato_saida)
+    print(f"{total} registros gravados em {argumentos.saida}", file=sys.stderr)
+    return 0
+
+
+def _cli_gerar(argumentos):
+    total = gravar_fluxo(argumentos.saida, gerar_dados_simulados(argumentos.registros, argumentos.semente),
+                         argumentos.formato_saida)
+    print(f"{total} registros simulados gravados em {argumentos.saida}", file=sys.stderr)
+    return 0
+
+
+def criar_parser_cli():
+    """Parser do modo em lote (sem argumentos, o programa abre os menus interativos)"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(
+        prog='app.py',
+        description="Controle de consumo de insumos: modo em lote. Sem subcomando, abre os menus interativos. "
+                    "Arquivos .bin/.insumos são binários (memmap), .jsonl é JSON por linha e o resto é CSV; "
+                    "'-' usa a entrada/saída padrão.")
+    subcomandos = parser.add_subparsers(dest='comando')
+    
+    def entrada_saida(sub, saida_padrao='-'):
+        sub.add_argument('--in', dest='entrada', required=True, help='arquivo de registros')
+        sub.add_argument('--out', dest='saida', default=saida_padrao, help=f'arquivo de saída (padrão: {saida_padrao})')
+        sub.add_argument('--formato-entrada', choices=('bin', 'csv', 'jsonl'))
+        sub.add_argument('--formato-saida', choices=('bin', 'csv', 'jsonl'))
+        sub.add_argument('--formato-data', help='formato strptime das datas não ISO, ex. %%d/%%m/%%Y')
+    
+    ordenar_parser = subcomandos.add_parser('sort', help='ordena um arquivo de registros')
+    entrada_saida(ordenar_parser)
+    ordenar_parser.add_argument('--by', dest='por', default='nome',
+                                help="critério(s) separados por vírgula: nome, quantidade, validade")
+    ordenar_parser.add_argument('--desc', dest='decrescente', action='store_true')
+    ordenar_parser.add_argument('--memoria', type=int, default=200_000,
+                                help='registros em memória por corrida na ordenação externa (CSV/JSONL)')
+    ordenar_parser.set_defaults(funcao=_cli_ordenar)
+    
+    buscar_parser = subcomandos.add_parser('search', help='busca registros por nome')
+    entrada_saida(buscar_parser)
+    buscar_parser.add_argument('--nome', required=True)
+    buscar_parser.add_argument('--prefixo', action='store_true', help='nomes que começam com --nome')
+    buscar_parser.add_argument('--limite', type=int)
+    buscar_parser.set_defaults(funcao=_cli_buscar)
+    
+    planejar_parser = subcomandos.add_parser('plan', help='planeja pedidos de vários insumos (JSONL na saída)')
+    planejar_parser.add_argument('--items', dest='itens', required=True,
+                                 help='CSV/JSONL com nome, consumo e parâmetros por insumo')
+    planejar_parser.add_argument('--out', dest='saida', default='-')
+    planejar_parser.add_argument('--workers', type=int, default=None, help='processos (padrão: núcleos)')
+    planejar_parser.add_argument('--solver', choices=('pd', 'ss'), default='ss',
+                                 help='pd: ProgramacaoDinamica; ss: PoliticaSS (mesmo resultado, mais rápida)')
+    planejar_parser.add_argument('--engine', choices=('python', 'numpy'), default='python')
+    planejar_parser.set_defaults(funcao=_cli_planejar)
+    
+    converter_parser = subcomandos.add_parser('convert', help='converte entre binário, CSV e JSONL')
+    entrada_saida(converter_parser)
+    converter_parser.add_argument('--processos', type=int, default=1, help='processos para interpretar CSV/JSONL')
+    converter_parser.set_defaults(funcao=_cli_converter)
+    
+    gerar_parser = subcomandos.add_parser('generate', help='grava dados simulados')
+    gerar_parser.add_argument('--out', dest='saida', default='-')
+    gerar_parser.add_argument('--formato-saida', choices=('bin', 'csv', 'jsonl'))
+    gerar_parser.add_argument('-n', '--registros', type=int, default=1000)
+    gerar_parser.add_argument('--semente', type=int, default=None)
+    gerar_parser.set_defaults(funcao=_cli_gerar)
+    
+    return parser
+
+
+def executar_cli(argv=None):
+    """Ponto de entrada: subcomando em lote, ou os menus interativos sem argumentos"""
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        main()
+        return 0
+    argumentos = criar_parser_cli().parse_args(argv)
+    if argumentos.comando is None:
+        main()
+        return 0
+    try:
+        return argumentos.funcao(argumentos)
+    except (OSError, ValueError) as erro:
+        print(f"erro: {erro}", file=sys.stderr)
+        return 2
+
+
 if __name__ == "__main__":
-    main()
+    sys.exit(executar_cli())
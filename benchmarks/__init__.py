@@ -0,0 +1,14 @@
+"""
+Benchmarks do sistema de controle de insumos
+
+    python -m benchmarks executar --saida resultados.json
+    python -m benchmarks comparar base.json resultados.json --limite 0.10
+
+Os dados vêm de gerar_dados_simulados com semente fixa, então duas execuções
+medem exatamente o mesmo trabalho.
+"""
+
+from .casos import GRUPOS, executar
+from .comparacao import comparar_resultados
+
+__all__ = ['GRUPOS', 'executar', 'comparar_resultados']
@@ -0,0 +1,89 @@
+"""Linha de comando: python -m benchmarks {executar,comparar}"""
+
+import argparse
+import json
+import sys
+
+from .casos import GRUPOS, executar
+from .comparacao import comparar_resultados
+
+
+def lista_inteiros(texto):
+    return tuple(int(parte) for parte in texto.split(',') if parte)
+
+
+def comando_executar(argumentos):
+    def mostrar(grupo, resultados):
+        for metrica, medida in resultados.items():
+            print(f"{metrica:<45} {medida['valor']:>14.6g} {medida['unidade']}")
+    
+    execucao = executar(
+        grupos=tuple(argumentos.grupos.split(',')),
+        tamanhos=argumentos.tamanhos,
+        tamanhos_filas=argumentos.tamanhos_filas,
+        horizontes=argumentos.horizontes,
+        repeticoes=argumentos.repeticoes,
+        semente=argumentos.semente,
+        ao_concluir=mostrar,
+    )
+    with open(argumentos.saida, 'w', encoding='utf-8') as arquivo:
+        json.dump(execucao, arquivo, indent=2, ensure_ascii=False)
+    print(f"\nResultados gravados em {argumentos.saida}")
+    return 0
+
+
+def comando_comparar(argumentos):
+    with open(argumentos.base, encoding='utf-8') as arquivo:
+        base = json.load(arquivo)
+    with open(argumentos.novo, encoding='utf-8') as arquivo:
+        novo = json.load(arquivo)
+    
+    linhas, regressoes, ausentes = comparar_resultados(base, novo, argumentos.limite)
+    for metrica, valor_base, valor_novo, variacao, regrediu in linhas:
+        marca = '  REGRESSÃO' if regrediu else ''
+        print(f"{metrica:<45} {valor_base:>12.6g} -> {valor_novo:<12.6g} {variacao:+8.1%}{marca}")
+    for metrica in ausentes:
+        print(f"{metrica:<45} ausente na nova execução")
+    
+    falhou = False
+    if regressoes:
+        print(f"\n{len(regressoes)} métrica(s) pioraram mais de {argumentos.limite:.0%}")
+        falhou = True
+    if ausentes and not argumentos.permitir_ausentes:
+        print(f"\n{len(ausentes)} métrica(s) da base ausentes na nova execução (use --permitir-ausentes para ignorar)")
+        falhou = True
+    if falhou:
+        return 1
+    print(f"\nNenhuma regressão acima de {argumentos.limite:.0%}")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description=__doc__)
+    subcomandos = parser.add_subparsers(dest='comando', required=True)
+    
+    executar_parser = subcomandos.add_parser('executar', help='roda os benchmarks e grava JSON')
+    executar_parser.add_argument('--saida', default='benchmarks.json')
+    executar_parser.add_argument('--grupos', default=','.join(GRUPOS))
+    executar_parser.add_argument('--tamanhos', type=lista_inteiros, default=(1_000, 10_000))
+    executar_parser.add_argument('--tamanhos-filas', type=lista_inteiros, default=(100_000,))
+    executar_parser.add_argument('--horizontes', type=lista_inteiros, default=(7, 30))
+    executar_parser.add_argument('--repeticoes', type=int, default=3)
+    executar_parser.add_argument('--semente', type=int, default=0)
+    executar_parser.set_defaults(funcao=comando_executar)
+    
+    comparar_parser = subcomandos.add_parser('comparar', help='falha se alguma métrica regrediu')
+    comparar_parser.add_argument('base')
+    comparar_parser.add_argument('novo')
+    comparar_parser.add_argument('--limite', type=float, default=0.10,
+                                 help='piora máxima tolerada, em fração (padrão 0.10)')
+    comparar_parser.add_argument('--permitir-ausentes', action='store_true',
+                                 help='não falha quando métricas da base faltam na nova execução')
+    comparar_parser.set_defaults(funcao=comando_comparar)
+    
+    argumentos = parser.parse_args(argv)
+    return argumentos.funcao(argumentos)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
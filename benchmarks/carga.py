@@ -0,0 +1,121 @@
+"""
+Gerador de carga para o servidor de consultas (servidor.py)
+
+    python -m benchmarks.carga --url http://127.0.0.1:8080 --conexoes 32 --requisicoes 5000
+
+Abre conexões HTTP/1.1 persistentes em paralelo (asyncio), sorteia consultas de busca,
+fatias ordenadas, vencimento e planos (com repetições, para exercitar o agrupamento de
+planos iguais) e reporta p50/p99 de latência por rota e a vazão total.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+from time import perf_counter
+from urllib.parse import quote, urlsplit
+
+NOMES = ["Reagente PCR", "Seringa 5ml", "Luva Descartável", "Álcool 70%", "Máscara N95",
+         "Swab Nasofaríngeo", "Tubo de Coleta", "Agulha 25G", "Gaze Estéril"]
+
+
+def sortear_consulta(gerador, planos_distintos):
+    """(rota, alvo) de uma consulta aleatória"""
+    rota = gerador.choices(('busca', 'prefixo', 'ordenados', 'vencendo', 'plano'), (30, 10, 25, 20, 15))[0]
+    if rota == 'busca':
+        return rota, f"/busca?nome={quote(gerador.choice(NOMES))}&limite=20"
+    if rota == 'prefixo':
+        return rota, f"/busca?nome={quote(gerador.choice(NOMES)[:3])}&prefixo=1&limite=10"
+    if rota == 'ordenados':
+        por = gerador.choice(('nome', 'validade', 'quantidade', 'validade,nome'))
+        return rota, f"/ordenados?por={por}&inicio={gerador.randrange(0, 1000)}&limite=50"
+    if rota == 'vencendo':
+        return rota, f"/vencendo?ate=20{gerador.randint(10, 30)}-0{gerador.randint(1, 9)}-15&limite=50"
+    semente = gerador.randrange(planos_distintos)
+    consumo = ','.join(str(random.Random(semente).randint(0, 80) + d) for d in range(14))
+    return rota, f"/plano?consumo={consumo}&custo_falta=40"
+
+
+def percentil(valores, fracao):
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(fracao * len(ordenados)))]
+
+
+async def conexao(host, porta, consultas, latencias, erros):
+    leitor, escritor = await asyncio.open_connection(host, porta)
+    try:
+        for rota, alvo in consultas:
+            inicio = perf_counter()
+            escritor.write(f"GET {alvo} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode('latin-1'))
+            await escritor.drain()
+            status = int((await leitor.readline()).split()[1])
+            tamanho = 0
+            while True:
+                linha = await leitor.readline()
+                if linha in (b'\r\n', b''):
+                    break
+                nome, _, valor = linha.decode('latin-1').partition(':')
+                if nome.strip().lower() == 'content-length':
+                    tamanho = int(valor)
+            await leitor.readexactly(tamanho)
+            latencias.setdefault(rota, []).append(perf_counter() - inicio)
+            if status != 200:
+                erros[rota] = erros.get(rota, 0) + 1
+    finally:
+        escritor.close()
+
+
+async def gerar_carga(url, conexoes=16, requisicoes=2000, planos_distintos=20, semente=0):
+    """Dispara a carga e retorna o relatório {rota: {requisicoes, erros, p50_ms, p99_ms}, ...}"""
+    partes = urlsplit(url)
+    gerador = random.Random(semente)
+    consultas = [sortear_consulta(gerador, planos_distintos) for _ in range(requisicoes)]
+    latencias, erros = {}, {}
+    
+    inicio = perf_counter()
+    await asyncio.gather(*(conexao(partes.hostname, partes.port or 80, consultas[i::conexoes], latencias, erros)
+                           for i in range(conexoes)))
+    decorrido = perf_counter() - inicio
+    
+    todas = [valor for valores in latencias.values() for valor in valores]
+    relatorio = {'total': {'requisicoes': len(todas), 'erros': sum(erros.values()),
+                           'p50_ms': percentil(todas, 0.50) * 1000, 'p99_ms': percentil(todas, 0.99) * 1000,
+                           'requisicoes_por_segundo': len(todas) / decorrido}}
+    for rota, valores in sorted(latencias.items()):
+        relatorio[rota] = {'requisicoes': len(valores), 'erros': erros.get(rota, 0),
+                           'p50_ms': percentil(valores, 0.50) * 1000, 'p99_ms': percentil(valores, 0.99) * 1000}
+    return relatorio
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.carga', description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://127.0.0.1:8080')
+    parser.add_argument('--conexoes', type=int, default=16)
+    parser.add_argument('--requisicoes', type=int, default=2000)
+    parser.add_argument('--planos-distintos', type=int, default=20,
+                        help='consumos distintos sorteados em /plano (menos = mais agrupamento)')
+    parser.add_argument('--semente', type=int, default=0)
+    parser.add_argument('--json', action='store_true', help='imprime o relatório em JSON')
+    argumentos = parser.parse_args(argv)
+    
+    relatorio = asyncio.run(gerar_carga(argumentos.url, argumentos.conexoes, argumentos.requisicoes,
+                                        argumentos.planos_distintos, argumentos.semente))
+    if argumentos.json:
+        print(json.dumps(relatorio, indent=2))
+    else:
+        total = relatorio['total']
+        print(f"{total['requisicoes']} requisições, {total['erros']} erros, "
+              f"{total['requisicoes_por_segundo']:.0f} req/s")
+        print(f"{'rota':<12} {'n':>7} {'p50 (ms)':>10} {'p99 (ms)':>10} {'erros':>6}")
+        for rota, medida in relatorio.items():
+            print(f"{rota:<12} {medida['requisicoes']:>7} {medida['p50_ms']:>10.2f} "
+                  f"{medida['p99_ms']:>10.2f} {medida['erros']:>6}")
+    return 1 if relatorio['total']['erros'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,141 @@
+"""Casos de benchmark: busca, ordenação, filas e programação dinâmica"""
+
+import platform
+import random
+from datetime import datetime
+from time import perf_counter
+
+import app
+
+
+def cronometrar(funcao, repeticoes):
+    """Melhor tempo (segundos) de `repeticoes` execuções de funcao()"""
+    melhor = None
+    for _ in range(repeticoes):
+        inicio = perf_counter()
+        funcao()
+        decorrido = perf_counter() - inicio
+        melhor = decorrido if melhor is None else min(melhor, decorrido)
+    return melhor
+
+
+def medida(valor, unidade='s', maior_melhor=False):
+    return {'valor': valor, 'unidade': unidade, 'maior_melhor': maior_melhor}
+
+
+def bench_busca(tamanhos, repeticoes, semente, consultas=200):
+    """busca_sequencial contra busca_binaria (lista já ordenada), tempo médio por consulta"""
+    resultados = {}
+    for n in tamanhos:
+        dados = app.gerar_dados_simulados(n, semente=semente)
+        ordenados = app.ordenar(dados, 'nome')
+        gerador = random.Random(semente)
+        nomes = [gerador.choice(dados).nome for _ in range(consultas)]
+        
+        def sequencial():
+            for nome in nomes:
+                app.busca_sequencial(dados, nome)
+        
+        def binaria():
+            for nome in nomes:
+                app.busca_binaria(ordenados, nome)
+        
+        resultados[f'busca.sequencial.n={n}'] = medida(cronometrar(sequencial, repeticoes) / consultas)
+        resultados[f'busca.binaria.n={n}'] = medida(cronometrar(binaria, repeticoes) / consultas)
+    return resultados
+
+
+def bench_ordenacao(tamanhos, repeticoes, semente, criterios=('nome', 'validade')):
+    """merge_sort, quick_sort e sorted() por critério"""
+    resultados = {}
+    for n in tamanhos:
+        dados = app.gerar_dados_simulados(n, semente=semente)
+        for criterio in criterios:
+            chave = app.EXTRATORES_CHAVE[criterio]
+            casos = {
+                'merge_sort': lambda: app.merge_sort(dados, criterio),
+                'quick_sort': lambda: app.quick_sort(dados, criterio),
+                'sorted': lambda: sorted(dados, key=chave),
+            }
+            for nome, funcao in casos.items():
+                resultados[f'ordenacao.{nome}.{criterio}.n={n}'] = medida(cronometrar(funcao, repeticoes))
+    return resultados
+
+
+def bench_filas(tamanhos, repeticoes, semente):
+    """Vazão (itens/s) de encher e esvaziar Fila e Pilha item a item"""
+    resultados = {}
+    for n in tamanhos:
+        dados = app.gerar_dados_simulados(min(n, 1000), semente=semente)
+        itens = [dados[i % len(dados)] for i in range(n)]
+        
+        def fila():
+            estrutura = app.Fila()
+            for item in itens:
+                estrutura.enfileirar(item)
+            while estrutura.desenfileirar() is not None:
+                pass
+        
+        def pilha():
+            estrutura = app.Pilha()
+            for item in itens:
+                estrutura.empilhar(item)
+            while estrutura.desempilhar() is not None:
+                pass
+        
+        resultados[f'filas.fila.n={n}'] = medida(n / cronometrar(fila, repeticoes), 'itens/s', True)
+        resultados[f'filas.pilha.n={n}'] = medida(n / cronometrar(pilha, repeticoes), 'itens/s', True)
+    return resultados
+
+
+def bench_pd(horizontes, repeticoes, semente):
+    """ProgramacaoDinamica.recursivo contra iterativo, consumo diário das quantidades simuladas"""
+    resultados = {}
+    for dias in horizontes:
+        consumo = [insumo.quantidade for insumo in app.gerar_dados_simulados(dias, semente=semente)]
+        pd = app.ProgramacaoDinamica(consumo)
+        casos = {
+            'recursivo': lambda: pd.recursivo(),
+            'iterativo': lambda: pd.iterativo(),
+        }
+        for nome, funcao in casos.items():
+            resultados[f'pd.{nome}.dias={dias}'] = medida(cronometrar(funcao, repeticoes))
+    return resultados
+
+
+GRUPOS = {
+    'busca': ('tamanhos', bench_busca),
+    'ordenacao': ('tamanhos', bench_ordenacao),
+    'filas': ('tamanhos_filas', bench_filas),
+    'pd': ('horizontes', bench_pd),
+}
+
+
+def executar(grupos=tuple(GRUPOS), tamanhos=(1_000, 10_000), tamanhos_filas=(100_000,),
+             horizontes=(7, 30), repeticoes=3, semente=0, ao_concluir=None):
+    """
+    Executa os grupos pedidos e retorna {'meta': ..., 'resultados': {métrica: medida}}
+    ao_concluir(nome_do_grupo, resultados_do_grupo) é chamado após cada grupo
+    """
+    parametros = {'tamanhos': tamanhos, 'tamanhos_filas': tamanhos_filas, 'horizontes': horizontes}
+    resultados = {}
+    for grupo in grupos:
+        if grupo not in GRUPOS:
+            raise ValueError(f"Grupo desconhecido: {grupo!r} (use {', '.join(GRUPOS)})")
+        parametro, funcao = GRUPOS[grupo]
+        parciais = funcao(parametros[parametro], repeticoes, semente)
+        resultados.update(parciais)
+        if ao_concluir is not None:
+            ao_concluir(grupo, parciais)
+    
+    return {
+        'meta': {
+            'data': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'plataforma': platform.platform(),
+            'semente': semente,
+            'repeticoes': repeticoes,
+            'parametros': {'grupos': list(grupos), **{chave: list(valor) for chave, valor in parametros.items()}},
+        },
+        'resultados': resultados,
+    }
@@ -0,0 +1,30 @@
+"""Comparação de duas execuções com limite de regressão"""
+
+
+def comparar_resultados(base, novo, limite=0.10):
+    """
+    Compara as métricas da execução base com as da nova
+    
+    Uma métrica regride quando piora mais que `limite` (fração: 0.10 = 10%):
+    tempo que sobe ou vazão (maior_melhor) que cai.
+    Retorna (linhas, regressoes, ausentes): linhas = [(métrica, base, novo, variação, regrediu)],
+    variação positiva = piorou; ausentes = métricas da base que faltam na nova execução
+    """
+    linhas = []
+    regressoes = []
+    ausentes = []
+    for metrica, medida_base in sorted(base['resultados'].items()):
+        medida_nova = novo['resultados'].get(metrica)
+        if medida_nova is None:
+            ausentes.append(metrica)
+            continue
+        if not medida_base['valor']:
+            continue
+        variacao = (medida_nova['valor'] - medida_base['valor']) / medida_base['valor']
+        if medida_base.get('maior_melhor'):
+            variacao = -variacao
+        regrediu = variacao > limite
+        linhas.append((metrica, medida_base['valor'], medida_nova['valor'], variacao, regrediu))
+        if regrediu:
+            regressoes.append(metrica)
+    return linhas, regressoes, ausentes
@@ -0,0 +1,322 @@
+"""
+Servidor de consultas HTTP/JSON (asyncio) sobre os registros de consumo
+
+Carrega os dados uma vez e atende vários front-ends ao mesmo tempo:
+
+    GET  /saude
+    GET  /busca?nome=Seringa 5ml            (prefixo=1 para autocompletar, limite=N)
+    GET  /ordenados?por=validade,nome&desc=0&inicio=0&limite=50
+    GET  /vencendo?ate=2024-05-01           (lotes com validade até a data, em ordem)
+    GET  /plano?consumo=30,50,10&custo_falta=40&estoque_inicial=0&solver=ss
+    POST /plano                              (o mesmo em JSON no corpo)
+
+As soluções de PD rodam num pool de processos, fora do laço de eventos, e pedidos
+idênticos em andamento são agrupados: o segundo espera a mesma solução em vez de
+resolver de novo.
+
+    python servidor.py --dados historico.bin --porta 8080
+    python servidor.py --simulados 100000
+"""
+import argparse
+import asyncio
+import json
+import sys
+from bisect import bisect_right
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import app
+
+
+PARAMETROS_PLANO = ('custo_pedido', 'custo_armazenamento', 'custo_falta', 'capacidade_max', 'passo_pedido')
+LIMITE_PADRAO = 100
+TAMANHO_MAXIMO_CORPO = 1 << 20
+MOTIVOS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           413: 'Payload Too Large', 500: 'Internal Server Error'}
+
+
+class ErroConsulta(Exception):
+    """Erro do cliente (parâmetro ausente ou inválido), respondido com o status dado"""
+    
+    def __init__(self, mensagem, status=400):
+        super().__init__(mensagem)
+        self.status = status
+
+
+def insumo_json(insumo):
+    return {'nome': insumo.nome, 'quantidade': insumo.quantidade,
+            'data': insumo.data.isoformat(), 'validade': insumo.validade.isoformat()}
+
+
+def resolver_plano(solver, consumo, parametros, estoque_inicial, engine):
+    """Executado no pool de processos: uma solução de PD"""
+    classe = app.PoliticaSS if solver == 'ss' else app.ProgramacaoDinamica
+    custo, decisoes = classe(consumo, **parametros).iterativo(estoque_inicial, engine=engine)
+    return {'custo': custo, 'decisoes': [int(pedido) for pedido in decisoes]}
+
+
+class ServidorConsultas:
+    """
+    Estado do servidor: registros carregados uma vez e os índices sobre eles
+    - IndiceOrdenado para busca por nome e prefixo
+    - cada ordenação pedida em /ordenados é feita uma vez, fora do laço de eventos, e guardada
+      por (critérios, direção); os critérios são validados e sem repetição, então há no máximo
+      30 ordenações possíveis. /vencendo usa a ordenação por validade com bisect
+    - _em_andamento: planos e ordenações sendo calculados, por chave canônica, para agrupar pedidos iguais
+    """
+    
+    def __init__(self, registros, executor=None, engine='python'):
+        self.registros = list(registros)
+        self.indice_nome = app.IndiceOrdenado(self.registros)
+        self._ordenacoes = {}
+        self._validades = None
+        self.executor = executor
+        self.engine = engine
+        self._em_andamento = {}
+        self.estatisticas = {'requisicoes': 0, 'planos_resolvidos': 0, 'planos_agrupados': 0}
+    
+    def _agrupar(self, chave, iniciar):
+        """Future em andamento para a chave, ou um novo criado por iniciar(); retorna (future, novo)"""
+        tarefa = self._em_andamento.get(chave)
+        if tarefa is not None:
+            return tarefa, False
+        tarefa = iniciar()
+        self._em_andamento[chave] = tarefa
+        tarefa.add_done_callback(lambda _: self._em_andamento.pop(chave, None))
+        return tarefa, True
+    
+    async def ordenados(self, criterios, decrescente):
+        """Registros ordenados; a primeira vez roda num thread do executor padrão, agrupando pedidos iguais"""
+        chave = (criterios, decrescente)
+        if chave not in self._ordenacoes:
+            laco = asyncio.get_running_loop()
+            tarefa, _ = self._agrupar(('ordenados',) + chave, lambda: laco.run_in_executor(
+                None, app.ordenar, self.registros, criterios, decrescente))
+            self._ordenacoes[chave] = await asyncio.shield(tarefa)
+        return self._ordenacoes[chave]
+    
+    # Rotas
+    
+    def saude(self, consulta):
+        return {'registros': len(self.registros), 'em_andamento': len(self._em_andamento), **self.estatisticas}
+    
+    def busca(self, consulta):
+        nome = obrigatorio(consulta, 'nome')
+        limite = inteiro(consulta, 'limite', LIMITE_PADRAO)
+        if consulta.get('prefixo') in ('1', 'true', 'sim'):
+            resultados = self.indice_nome.prefixo(nome, limite)
+        else:
+            resultados = self.indice_nome.buscar(nome)[:limite]
+        return {'total': len(resultados), 'registros': [insumo_json(insumo) for _, insumo in resultados]}
+    
+    async def ordenados_rota(self, consulta):
+        criterios = criterios_ordenacao(consulta.get('por', 'nome'))
+        decrescente = consulta.get('desc') in ('1', 'true', 'sim')
+        inicio = inteiro(consulta, 'inicio', 0)
+        limite = inteiro(consulta, 'limite', LIMITE_PADRAO)
+        ordenados = await self.ordenados(criterios, decrescente)
+        return {'total': len(ordenados), 'inicio': inicio,
+                'registros': [insumo_json(insumo) for insumo in ordenados[inicio:inicio + limite]]}
+    
+    async def vencendo(self, consulta):
+        ate = obrigatorio(consulta, 'ate')
+        try:
+            data = app.interpretar_data(ate)
+        except app.RegistroInvalido as erro:
+            raise ErroConsulta(str(erro)) from None
+        limite = inteiro(consulta, 'limite', LIMITE_PADRAO)
+        ordenados = await self.ordenados(('validade',), False)
+        if self._validades is None:
+            self._validades = [insumo.validade for insumo in ordenados]
+        fim = bisect_right(self._validades, data)
+        return {'total': fim, 'registros': [insumo_json(insumo) for insumo in ordenados[:min(fim, limite)]]}
+    
+    async def plano(self, consulta):
+        consumo = consulta.get('consumo')
+        if isinstance(consumo, str):
+            consumo = consumo.replace(';', ',').split(',')
+        try:
+            consumo = [int(valor) for valor in consumo or ()]
+            parametros = {chave: int(consulta[chave]) for chave in PARAMETROS_PLANO
+                          if consulta.get(chave) not in (None, '')}
+            estoque_inicial = int(consulta.get('estoque_inicial', 0))
+            if parametros.get('capacidade_max', 0) < 0:
+                raise ErroConsulta("capacidade_max não pode ser negativa")
+            capacidade = app.ProgramacaoDinamica(consumo, **parametros).capacidade_max
+        except (TypeError, ValueError) as erro:
+            raise ErroConsulta(f"Plano inválido: {erro}") from None
+        if not 0 <= estoque_inicial <= capacidade:
+            raise ErroConsulta(f"estoque_inicial deve estar entre 0 e capacidade_max ({capacidade})")
+        solver = consulta.get('solver', 'ss')
+        if solver not in ('ss', 'pd'):
+            raise ErroConsulta("solver deve ser 'ss' ou 'pd'")
+        
+        chave = json.dumps([solver, consumo, sorted(parametros.items()), estoque_inicial])
+        laco = asyncio.get_running_loop()
+        tarefa, novo = self._agrupar(chave, lambda: laco.run_in_executor(
+            self.executor, resolver_plano, solver, consumo, parametros, estoque_inicial, self.engine))
+        self.estatisticas['planos_resolvidos' if novo else 'planos_agrupados'] += 1
+        return await asyncio.shield(tarefa)
+    
+    async def despachar(self, metodo, caminho, consulta):
+        rotas = {
+            '/saude': self.saude,
+            '/busca': self.busca,
+            '/ordenados': self.ordenados_rota,
+            '/vencendo': self.vencendo,
+        }
+        if caminho == '/plano':
+            if metodo not in ('GET', 'POST'):
+                raise ErroConsulta("Use GET ou POST", 405)
+            return await self.plano(consulta)
+        if caminho not in rotas:
+            raise ErroConsulta(f"Rota desconhecida: {caminho}", 404)
+        if metodo != 'GET':
+            raise ErroConsulta("Use GET", 405)
+        resposta = rotas[caminho](consulta)
+        if asyncio.iscoroutine(resposta):
+            resposta = await resposta
+        return resposta
+    
+    # HTTP
+    
+    async def atender(self, leitor, escritor):
+        """Uma conexão HTTP/1.1, com keep-alive"""
+        try:
+            while True:
+                linha = await leitor.readline()
+                if not linha:
+                    break
+                try:
+                    metodo, alvo, versao = linha.decode('latin-1').split()
+                except ValueError:
+                    await responder(escritor, 400, {'erro': 'Requisição malformada'}, False)
+                    break
+                cabecalhos = {}
+                while True:
+                    cabecalho = await leitor.readline()
+                    if cabecalho in (b'\r\n', b'\n', b''):
+                        break
+                    nome, _, valor = cabecalho.decode('latin-1').partition(':')
+                    cabecalhos[nome.strip().lower()] = valor.strip()
+                manter = (cabecalhos.get('connection', '').lower() != 'close'
+                          and versao.upper() == 'HTTP/1.1')
+                
+                try:
+                    tamanho = int(cabecalhos.get('content-length', 0) or 0)
+                except ValueError:
+                    tamanho = -1
+                if tamanho < 0:
+                    await responder(escritor, 400, {'erro': 'Content-Length inválido'}, False)
+                    break
+                if tamanho > TAMANHO_MAXIMO_CORPO:
+                    await responder(escritor, 413, {'erro': 'Corpo grande demais'}, False)
+                    break
+                corpo = await leitor.readexactly(tamanho) if tamanho else b''
+                
+                self.estatisticas['requisicoes'] += 1
+                status, resposta = await self.processar(metodo.upper(), alvo, corpo)
+                await responder(escritor, status, resposta, manter)
+                if not manter:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            escritor.close()
+    
+    async def processar(self, metodo, alvo, corpo):
+        partes = urlsplit(alvo)
+        consulta = {chave: valores[-1] for chave, valores in parse_qs(partes.query).items()}
+        try:
+            if corpo:
+                try:
+                    dados = json.loads(corpo)
+                except ValueError:
+                    raise ErroConsulta("Corpo não é JSON válido") from None
+                if not isinstance(dados, dict):
+                    raise ErroConsulta("O corpo deve ser um objeto JSON")
+                consulta.update(dados)
+            return 200, await self.despachar(metodo, unquote(partes.path).rstrip('/') or '/', consulta)
+        except ErroConsulta as erro:
+            return erro.status, {'erro': str(erro)}
+        except Exception as erro:
+            return 500, {'erro': f"{type(erro).__name__}: {erro}"}
+
+
+def criterios_ordenacao(texto):
+    """Critérios de 'por' validados, na ordem dada e sem repetição"""
+    criterios = tuple(dict.fromkeys(criterio.strip() for criterio in texto.split(',') if criterio.strip()))
+    if not criterios:
+        raise ErroConsulta("Informe ao menos um critério em 'por'")
+    for criterio in criterios:
+        if criterio not in app.InsumoStore.CRITERIOS:
+            raise ErroConsulta(f"Critério desconhecido: {criterio!r} (use {', '.join(app.InsumoStore.CRITERIOS)})")
+    return criterios
+
+
+def obrigatorio(consulta, nome):
+    valor = consulta.get(nome)
+    if valor in (None, ''):
+        raise ErroConsulta(f"Parâmetro obrigatório: {nome}")
+    return valor
+
+
+def inteiro(consulta, nome, padrao):
+    try:
+        valor = int(consulta.get(nome, padrao))
+    except (TypeError, ValueError):
+        raise ErroConsulta(f"{nome} deve ser inteiro") from None
+    if valor < 0:
+        raise ErroConsulta(f"{nome} não pode ser negativo")
+    return valor
+
+
+async def responder(escritor, status, corpo, manter):
+    conteudo = json.dumps(corpo, ensure_ascii=False).encode('utf-8')
+    cabecalho = (f"HTTP/1.1 {status} {MOTIVOS.get(status, '')}\r\n"
+                 f"Content-Type: application/json; charset=utf-8\r\n"
+                 f"Content-Length: {len(conteudo)}\r\n"
+                 f"Connection: {'keep-alive' if manter else 'close'}\r\n\r\n")
+    escritor.write(cabecalho.encode('latin-1') + conteudo)
+    await escritor.drain()
+
+
+async def servir(servidor, host='127.0.0.1', porta=8080, pronto=None):
+    """Atende até ser cancelado; pronto(endereco) é chamado quando o socket está escutando"""
+    tcp = await asyncio.start_server(servidor.atender, host, porta)
+    endereco = tcp.sockets[0].getsockname()
+    if pronto is not None:
+        pronto(endereco)
+    async with tcp:
+        await tcp.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Servidor HTTP/JSON de consultas sobre os registros de consumo")
+    origem = parser.add_mutually_exclusive_group()
+    origem.add_argument('--dados', help='arquivo de registros (.bin, .csv ou .jsonl)')
+    origem.add_argument('--simulados', type=int, default=10_000, help='registros simulados (padrão 10000)')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--porta', type=int, default=8080)
+    parser.add_argument('--workers', type=int, default=None, help='processos para resolver PD (padrão: núcleos)')
+    parser.add_argument('--engine', choices=('python', 'numpy'), default='python')
+    argumentos = parser.parse_args(argv)
+    
+    if argumentos.dados:
+        registros = app.ler_registros(argumentos.dados)
+    else:
+        registros = app.gerar_dados_simulados(argumentos.simulados, semente=0)
+    
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=argumentos.workers) as executor:
+        servidor = ServidorConsultas(registros, executor, argumentos.engine)
+        pronto = lambda endereco: print(f"{len(servidor.registros)} registros; ouvindo em "
+                                        f"http://{endereco[0]}:{endereco[1]}", file=sys.stderr)
+        try:
+            asyncio.run(servir(servidor, argumentos.host, argumentos.porta, pronto))
+        except KeyboardInterrupt:
+            pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())